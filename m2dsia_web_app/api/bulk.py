@@ -0,0 +1,82 @@
+# api/bulk.py
+"""
+Parsing and validation of bulk user imports (JSON array, NDJSON or CSV)
+before they are handed to crud.bulk_create_users.
+"""
+import csv
+import io
+import json
+from typing import Any, Dict, List, Tuple
+
+from pydantic import ValidationError
+
+from schemas.schemas import UserCreate
+
+# Accepted payload formats, by Content-Type / file extension
+BULK_FORMATS = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "text/csv": "csv",
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".csv": "csv",
+}
+
+def detect_format(content_type: str = "", filename: str = "") -> str:
+    """Resolve the payload format from a filename or a Content-Type header"""
+    if filename:
+        for extension, format in BULK_FORMATS.items():
+            if extension.startswith(".") and filename.lower().endswith(extension):
+                return format
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in BULK_FORMATS:
+        return BULK_FORMATS[media_type]
+    raise ValueError(f"Unsupported bulk import format: '{media_type or filename}' (json, ndjson or csv)")
+
+def parse_rows(payload: bytes, format: str) -> List[Dict[str, Any]]:
+    """Decode a payload into a list of raw row dicts"""
+    text = payload.decode("utf-8-sig")
+    
+    if format == "json":
+        rows = json.loads(text)
+        if not isinstance(rows, list):
+            raise ValueError("JSON payload must be an array of users")
+        return rows
+    
+    if format == "ndjson":
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    
+    return list(csv.DictReader(io.StringIO(text)))
+
+def validate_rows(rows: List[Dict[str, Any]]) -> Tuple[List[Tuple[int, UserCreate]], List[Dict[str, Any]]]:
+    """
+    Validate rows with UserCreate and deduplicate on email (first occurrence wins).
+    Returns the valid (row number, user) pairs and the report entries of rejected rows.
+    """
+    valid = []
+    rejected = []
+    seen = set()
+    
+    for row_number, row in enumerate(rows, start=1):
+        email = row.get("email") if isinstance(row, dict) else None
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("Row must be an object")
+            user = UserCreate(**row)
+        except (ValidationError, ValueError, TypeError) as e:
+            errors = e.errors() if isinstance(e, ValidationError) else None
+            message = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in errors) if errors else str(e)
+            rejected.append({"row": row_number, "email": email, "status": "invalid", "error": message})
+            continue
+        
+        if user.email in seen:
+            rejected.append({"row": row_number, "email": user.email, "status": "duplicate",
+                             "error": "Email already present earlier in the payload"})
+            continue
+        
+        seen.add(user.email)
+        valid.append((row_number, user))
+    
+    return valid, rejected
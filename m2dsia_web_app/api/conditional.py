@@ -0,0 +1,117 @@
+# api/conditional.py
+"""
+HTTP conditional requests: ETag / Last-Modified validators and
+304 Not Modified, checked before the page is fetched and serialized.
+
+* one user: hash of its UserResponse fields (exact, no extra query),
+  Last-Modified from updated_at;
+* a collection (list and class endpoints): version probe count +
+  max(updated_at) (crud.get_users_version), combined with the path, the
+  query string (cursor, limit, full...) and the negotiated format (Vary: Accept).
+  Only the ETag is compared: a delete leaves max(updated_at), hence
+  Last-Modified, unchanged, so If-Modified-Since would answer 304 with a
+  stale list.
+
+updated_at has a one-second resolution (CURRENT_TIMESTAMP): a collection
+modified during the current second of the database gets no validator,
+since a later change within that second would keep the same version.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from api.serialization import page_format
+from db.crud import EXPORT_COLUMNS
+
+# Cached copies must always be revalidated (no heuristic freshness from Last-Modified)
+CACHE_CONTROL = "no-cache"
+
+class Validators:
+    """
+    ETag and Last-Modified of a representation; trust_date tells whether
+    Last-Modified may answer If-Modified-Since (one-second resolution)
+    """
+
+    def __init__(self, etag: str, last_modified: Optional[datetime], trust_date: bool, vary: Optional[str] = None):
+        self.etag = etag
+        self.last_modified = _utc(last_modified) if last_modified is not None else None
+        self.trust_date = trust_date
+        self.vary = vary
+
+    def headers(self) -> Dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": CACHE_CONTROL}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        if self.vary:
+            headers["Vary"] = self.vary
+        return headers
+
+def _utc(value: datetime) -> datetime:
+    # Naive values come from CURRENT_TIMESTAMP (UTC); HTTP dates have no sub-second part
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+def _etag(key: str) -> str:
+    # Weak: the bytes may differ (e.g. compression), the content does not
+    return 'W/"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"'
+
+def user_validators(user: Any) -> Validators:
+    """Validators of one user (ORM instance or cached copy)"""
+    key = repr(tuple(getattr(user, name) for name in EXPORT_COLUMNS))
+    return Validators(_etag(key), getattr(user, "updated_at", None), trust_date=False)
+
+def collection_validators(
+    request: Request, version: Tuple[int, Optional[datetime], Optional[datetime]]
+) -> Optional[Validators]:
+    """
+    Validators of a list response from crud.get_users_version, None while
+    the collection is modified during the current second
+    """
+    count, last_modified, now = version
+    if last_modified is not None and (now is None or _utc(last_modified) >= _utc(now)):
+        return None
+    key = f"{request.url.path}?{request.url.query}|{page_format(request)}|{count}|{last_modified}"
+    # Last-Modified misses deletes: only the ETag (which has the count) is compared
+    return Validators(_etag(key), last_modified, trust_date=False, vary="Accept")
+
+def _opaque(tag: str) -> str:
+    # Weak comparison (RFC 7232 §2.3.2): W/ prefixes are ignored
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def is_not_modified(request: Request, validators: Optional[Validators]) -> bool:
+    """
+    Evaluate If-None-Match, or If-Modified-Since when absent (RFC 7232 §6)
+    """
+    if validators is None:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {_opaque(tag) for tag in if_none_match.split(",")}
+        return "*" in tags or _opaque(validators.etag) in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and validators.trust_date and validators.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return since.tzinfo is not None and validators.last_modified <= since
+    return False
+
+def not_modified_response(validators: Validators) -> Response:
+    """304 with the validators and no body"""
+    return Response(status_code=304, headers=validators.headers())
+
+def with_validators(result: Any, response: Response, validators: Optional[Validators]) -> Any:
+    """
+    Attach the validators to an endpoint result: a Response, or a value
+    validated by response_model (headers set on the injected `response`)
+    """
+    if validators is not None:
+        (result if isinstance(result, Response) else response).headers.update(validators.headers())
+    return result
@@ -0,0 +1,55 @@
+# api/export.py
+"""
+Serializers turning crud.stream_users batches into NDJSON or CSV chunks
+for StreamingResponse. One chunk is produced per database batch.
+"""
+import csv
+import io
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Sequence, Tuple
+
+from db.crud import EXPORT_COLUMNS
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def ndjson_chunk(rows: Sequence[Tuple]) -> str:
+    """Serialize one batch of rows as newline-delimited JSON"""
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+def csv_chunk(rows: Sequence[Tuple]) -> str:
+    """Serialize one batch of rows as CSV lines"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+CSV_HEADER = csv_chunk([EXPORT_COLUMNS])
+
+def iter_ndjson(batches: Iterable[Sequence[Tuple]]) -> Iterator[str]:
+    """Serialize batches of rows as newline-delimited JSON"""
+    for rows in batches:
+        yield ndjson_chunk(rows)
+
+def iter_csv(batches: Iterable[Sequence[Tuple]]) -> Iterator[str]:
+    """Serialize batches of rows as CSV, header first"""
+    yield CSV_HEADER
+    for rows in batches:
+        yield csv_chunk(rows)
+
+EXPORT_SERIALIZERS = {
+    "ndjson": iter_ndjson,
+    "csv": iter_csv,
+}
+
+async def aiter_export(format: str, batches: AsyncIterable[Sequence[Tuple]]) -> AsyncIterator[str]:
+    """Serialize batches from an async stream (db.async_crud.stream_users)"""
+    if format == "csv":
+        yield CSV_HEADER
+    chunk = csv_chunk if format == "csv" else ndjson_chunk
+    async for rows in batches:
+        yield chunk(rows)
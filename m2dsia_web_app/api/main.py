@@ -1,36 +1,108 @@
 # api/main.py 
-from fastapi import FastAPI, HTTPException, Depends, status, Query
+from fastapi import APIRouter, FastAPI, HTTPException, Depends, status, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response, JSONResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import Response, JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager, suppress
+from typing import Optional, Union
 import sys
 import os
+import time
+import asyncio
 import logging
 from datetime import datetime
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from db.connexion import get_db, engine, get_current_database_info, test_connection
-from db.crud import (
-    create_user, get_user_by_id, get_user_by_email, get_users, 
-    get_all_users, update_user, delete_user, get_users_by_class,
-    get_active_users, deactivate_user
+from db import connexion
+from db.connexion import (
+    get_session, USE_ASYNC_DB, init_engine_async, dispose_engines, monitor_replicas
+)
+from db.async_crud import (
+    AnySession, create_user, get_user_by_id, get_user_by_email, get_users,
+    update_user, delete_user, get_users_by_class,
+    get_active_users, deactivate_user, get_user_stats, get_user_counts, search_users as crud_search_users,
+    paginate, bulk_create_users, bulk_update_users, bulk_deactivate_users, bulk_delete_users,
+    get_users_version
+)
+from db import async_crud, crud
+from db.cache import user_cache
+from db.engine import ENGINE_SETTINGS, get_pool_status
+from db.health import health_monitor
+from db.schema import SchemaOutOfDate, ensure_schema
+from api.export import EXPORT_MEDIA_TYPES, EXPORT_SERIALIZERS, aiter_export
+from api.bulk import detect_format, parse_rows, validate_rows
+from api.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, instrument_engine, render_metrics
+from api.middleware import CompressionMiddleware, MetricsMiddleware, ReadYourWritesMiddleware
+from api.query_budget import QUERY_DETECTOR, query_budget
+from api.serialization import list_projection, page_response
+from api.conditional import (
+    collection_validators, is_not_modified, not_modified_response, user_validators, with_validators
+)
+from logger.filters import setup_logging
+from schemas.schemas import (
+    User, UserCreate, UserUpdate, UserResponse, UserPage, UserDetailPage, BulkImportReport,
+    BulkUserFilter, BulkUserUpdate, BulkOperationResult
 )
-from schemas.schemas import User, UserCreate, UserUpdate, UserResponse
-from models.models import Base
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (JSON files, background queue, sampling: logger/logging_config.yaml)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Create tables
-try:
-    Base.metadata.create_all(bind=engine)
-    logger.info("✅ Database tables created successfully")
-except Exception as e:
-    logger.error(f"❌ Failed to create database tables: {e}")
+def init_database(engine):
+    """Check the schema revision, running the missing migrations if allowed (db/schema.py)"""
+    try:
+        revision = ensure_schema(engine)
+        logger.info(f"✅ Database schema at revision {revision}")
+    except SchemaOutOfDate:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Database schema check failed: {e}")
+
+def instrument_database():
+    """SQL statement metrics (/metrics) on the primary, async and replica engines"""
+    instrument_engine(connexion.get_engine(), "primary")
+    async_engine = connexion.get_async_engine()
+    if async_engine is not None:
+        instrument_engine(async_engine, "primary-async")
+    for label, replicas in (("replica", connexion.replica_set), ("replica-async", connexion.async_replica_set)):
+        for index, replica in enumerate(replicas.replicas if replicas else []):
+            instrument_engine(replica.engine, f"{label}-{index}")
+
+# === ÉVÉNEMENTS D'APPLICATION ===
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Démarrage et arrêt de l'application"""
+    logger.info("🚀 M2DSIA API is starting up...")
+    started = time.perf_counter()
+    
+    # Engine selection (AWS RDS probe / SQLite fallback) without blocking the event loop
+    engine = await init_engine_async()
+    await run_in_threadpool(init_database, engine)
+    instrument_database()
+    
+    # First database probe, then cached health checks in the background (db/health.py)
+    if await health_monitor.check():
+        logger.info(f"✅ Database connected: {health_monitor.database}")
+        await health_monitor.refresh_user_counts()
+    health_task = asyncio.create_task(health_monitor.run())
+    
+    # Read replicas health check (ejection / return to rotation)
+    replicas_monitor = asyncio.create_task(monitor_replicas()) if connexion.replica_set else None
+    
+    logger.info(f"🎉 M2DSIA API started successfully in {time.perf_counter() - started:.2f}s!")
+    yield
+    
+    logger.info("🛑 M2DSIA API is shutting down...")
+    for task in (health_task, replicas_monitor):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    await dispose_engines()
+    logger.info("👋 Goodbye!")
 
 # Create FastAPI app with enhanced metadata
 app = FastAPI(
@@ -66,6 +138,7 @@ app = FastAPI(
     license_info={
         "name": "MIT",
     },
+    lifespan=lifespan,
 )
 
 # Add CORS middleware with enhanced security
@@ -77,14 +150,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Read-your-writes stickiness for the read replicas (no-op without DB_REPLICA_URLS)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# zstd / br / gzip negotiated from Accept-Encoding (outermost: compresses every response)
+app.add_middleware(CompressionMiddleware)
+
+# Per-request timing for /metrics (added last: the latency includes compression)
+app.add_middleware(MetricsMiddleware)
+
+# Shared query parameters for cursor-paginated list endpoints
+CURSOR_QUERY = Query(None, description="Curseur opaque retourné dans `next_cursor` par la page précédente")
+LIMIT_QUERY = Query(100, ge=1, le=1000, description="Nombre maximum d'utilisateurs à retourner")
+FULL_QUERY = Query(False, description="Retourner le schéma `User` complet (avec `created_at` / `updated_at`)")
+
+# Body of the list endpoints: UserPage, or UserDetailPage with full=true (OpenAPI anyOf)
+LIST_RESPONSE_MODEL = Union[UserPage, UserDetailPage]
+
+async def paginated_response(fetch, cursor: Optional[str], limit: int, scope: Optional[dict] = None) -> dict:
+    """Run a keyset-paginated fetch and build the UserPage payload"""
+    try:
+        users, next_cursor = await paginate(fetch, cursor=cursor, limit=limit, scope=scope)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"items": users, "next_cursor": next_cursor}
+
 # === ENDPOINTS SYSTÈME ===
 
 @app.get("/favicon.ico", include_in_schema=False)
+@query_budget(0)
 async def favicon():
     """Return empty favicon to avoid 404 errors"""
     return Response(content="", media_type="image/x-icon")
 
 @app.get("/", tags=["Système"])
+@query_budget(0)
 async def root():
     """
     🏠 Page d'accueil de l'API
@@ -101,54 +201,64 @@ async def root():
     }
 
 @app.get("/health", tags=["Système"])
+@query_budget(0)
 async def health_check():
     """
     ❤️ Vérification de santé de l'API
     
-    Vérifie que l'API et la base de données fonctionnent correctement.
+    Vérifie que l'API et la base de données fonctionnent correctement, à partir
+    du dernier test du pool fait en arrière-plan (`HEALTH_CHECK_INTERVAL`) :
+    aucune connexion n'est empruntée par l'appel.
     """
-    try:
-        # Test database connection
-        db_connected = test_connection()
-        db_info = get_current_database_info()
-        
-        return {
-            "status": "healthy" if db_connected else "unhealthy",
-            "message": "API is running",
-            "database": {
-                "connected": db_connected,
-                "type": db_info.get("type", "Unknown"),
-                "host": db_info.get("host", "Local"),
-                "database": db_info.get("database", "Unknown")
-            },
-            "timestamp": datetime.now().isoformat(),
-            "version": "2.0.0"
-        }
-    except Exception as e:
-        return JSONResponse(
-            status_code=503,
-            content={
-                "status": "unhealthy",
-                "message": f"Health check failed: {str(e)}",
-                "timestamp": datetime.now().isoformat()
-            }
-        )
+    database = health_monitor.status()
+    return {
+        "status": "healthy" if database["ready"] else "unhealthy",
+        "message": "API is running",
+        "database": {
+            **database,
+            "host": database.get("host", "Local"),
+            "database": database.get("database", database.get("file", "Unknown"))
+        },
+        "timestamp": datetime.now().isoformat(),
+        "version": "2.0.0"
+    }
+
+@app.get("/health/live", tags=["Système"])
+@query_budget(0)
+async def liveness():
+    """
+    💓 Liveness
+    
+    Le processus répond (sans consulter la base de données).
+    """
+    return {"status": "alive"}
+
+@app.get("/health/ready", tags=["Système"])
+@query_budget(0)
+async def readiness():
+    """
+    🚦 Readiness
+    
+    200 si le dernier test du pool a réussi il y a moins de `HEALTH_MAX_AGE`
+    secondes, 503 sinon (lu en mémoire).
+    """
+    if health_monitor.ready():
+        return {"status": "ready", "checked_at": health_monitor.status()["checked_at"]}
+    return JSONResponse(status_code=503, content={"status": "not ready", **health_monitor.status()})
 
 @app.get("/info", tags=["Système"])
-async def system_info():
+@query_budget(1)
+async def system_info(db: AnySession = Depends(get_session)):
     """
     📊 Informations système
     
     Retourne les informations détaillées sur le système et la base de données.
     """
     try:
-        db_info = get_current_database_info()
+        db_info = health_monitor.status()
         
-        # Get user statistics
-        db = next(get_db())
-        total_users = len(get_all_users(db))
-        active_users = len(get_active_users(db))
-        db.close()
+        # Incrementally maintained counts (one aggregate query when unknown)
+        stats = await get_user_counts(db)
         
         return {
             "api": {
@@ -158,9 +268,9 @@ async def system_info():
             },
             "database": db_info,
             "statistics": {
-                "total_users": total_users,
-                "active_users": active_users,
-                "inactive_users": total_users - active_users
+                "total_users": stats["total_users"],
+                "active_users": stats["active_users"],
+                "inactive_users": stats["inactive_users"]
             },
             "endpoints": {
                 "users": "/users/",
@@ -179,10 +289,72 @@ async def system_info():
             }
         )
 
+# Internal diagnostics (/debug/*), unauthenticated: only mounted when
+# DEBUG_ENDPOINTS=true (default: on with QUERY_DETECTOR, i.e. dev and tests)
+DEBUG_ENDPOINTS = os.getenv("DEBUG_ENDPOINTS", str(QUERY_DETECTOR)).lower() == "true"
+debug_router = APIRouter(prefix="/debug", tags=["Système"])
+
+@debug_router.get("/cache")
+@query_budget(0)
+async def cache_stats():
+    """
+    🗃️ Statistiques du cache utilisateurs
+    
+    Compteurs hits/misses/invalidations du cache de lecture (par processus
+    pour le backend LRU), utiles pour dimensionner `USER_CACHE_SIZE` / `USER_CACHE_TTL`.
+    """
+    return {
+        "user_cache": user_cache.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@debug_router.get("/pool")
+@query_budget(0)
+async def pool_status():
+    """
+    🔌 État du pool de connexions
+    
+    Connexions empruntées / disponibles, débordement (overflow) et temps
+    d'attente des checkouts, pour le moteur synchrone et le moteur asynchrone,
+    ainsi que l'état des réplicas de lecture.
+    """
+    async_engine = connexion.get_async_engine()
+    replicas = connexion.async_replica_set if USE_ASYNC_DB else connexion.replica_set
+    return {
+        "sync": get_pool_status(connexion.get_engine()),
+        "async": get_pool_status(async_engine) if async_engine is not None else None,
+        "replicas": [
+            {**status, "pool": get_pool_status(replica.engine)}
+            for status, replica in zip(replicas.status(), replicas.replicas)
+        ] if replicas else [],
+        "settings": {
+            key: ENGINE_SETTINGS[key]
+            for key in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle", "pool_pre_ping", "echo")
+        },
+        "timestamp": datetime.now().isoformat()
+    }
+
+if DEBUG_ENDPOINTS:
+    app.include_router(debug_router)
+
+@app.get("/metrics", tags=["Système"])
+@query_budget(0)
+async def metrics():
+    """
+    📈 Métriques Prometheus
+    
+    Latence et nombre de requêtes par route, requêtes en cours, requêtes SQL
+    (nombre et durée, par moteur et par requête HTTP) et état des pools, au
+    format texte Prometheus (valeurs par processus).
+    """
+    # Explicit header: media_type would get a second charset appended
+    return Response(content=render_metrics(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
 # === ENDPOINTS UTILISATEURS ===
 
 @app.post("/users/", response_model=UserResponse, status_code=status.HTTP_201_CREATED, tags=["Utilisateurs"])
-async def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
+@query_budget(3)
+async def create_new_user(user: UserCreate, db: AnySession = Depends(get_session)):
     """
     ➕ Créer un nouveau utilisateur
     
@@ -195,14 +367,14 @@ async def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
     """
     try:
         # Check if user already exists
-        existing_user = get_user_by_email(db, user.email)
+        existing_user = await get_user_by_email(db, user.email)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"User with email '{user.email}' already exists"
             )
         
-        db_user = create_user(db, user)
+        db_user = await create_user(db, user)
         logger.info(f"✅ User created: {user.email}")
         return db_user
     except ValueError as e:
@@ -212,124 +384,358 @@ async def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
         logger.error(f"❌ Error creating user: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-@app.get("/users/", response_model=List[UserResponse], tags=["Utilisateurs"])
+@app.post("/users/bulk", response_model=BulkImportReport, tags=["Utilisateurs"])
+@query_budget(None)
+async def bulk_import_users(
+    request: Request,
+    batch_size: int = Query(500, ge=1, le=5000, description="Nombre de lignes par INSERT multi-lignes"),
+    on_conflict: str = Query("skip", pattern="^(skip|update)$", description="Email existant : skip ou update"),
+    db: AnySession = Depends(get_session)
+):
+    """
+    📥 Import en masse d'utilisateurs
+    
+    Corps de requête au format :
+    
+    * **application/json** : tableau d'utilisateurs
+    * **application/x-ndjson** : un utilisateur JSON par ligne
+    * **text/csv** : colonnes `email,nom,prenom,classe`
+    * **multipart/form-data** : fichier `file` (.json, .ndjson, .csv)
+    
+    Chaque ligne est validée (`UserCreate`) et dédoublonnée sur l'email, puis
+    insérée par lots. La réponse détaille le résultat ligne par ligne :
+    `created`, `updated`, `exists`, `duplicate`, `invalid` ou `error`.
+    """
+    start = time.perf_counter()
+    try:
+        content_type = request.headers.get("content-type", "")
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or not hasattr(upload, "read"):
+                raise ValueError("Missing 'file' field in multipart upload")
+            format = detect_format(upload.content_type, upload.filename)
+            payload = await upload.read()
+        else:
+            format = detect_format(content_type)
+            payload = await request.body()
+        
+        rows = await run_in_threadpool(parse_rows, payload, format)
+        valid, report = await run_in_threadpool(validate_rows, rows)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    outcomes = await bulk_create_users(
+        db, [user for _, user in valid], batch_size=batch_size, on_conflict=on_conflict
+    )
+    for row_number, user in valid:
+        report.append({"row": row_number, "email": user.email, **outcomes[user.email]})
+    report.sort(key=lambda entry: entry["row"])
+    
+    summary = {}
+    for entry in report:
+        summary[entry["status"]] = summary.get(entry["status"], 0) + 1
+    
+    elapsed = time.perf_counter() - start
+    logger.info(f"📥 Bulk import of {len(rows)} rows ({format}): {summary} in {elapsed:.2f}s")
+    return {
+        "total": len(rows),
+        "summary": summary,
+        "rows_per_second": round(len(rows) / elapsed, 1) if elapsed else 0.0,
+        "results": report
+    }
+
+@app.patch("/users/bulk", response_model=BulkOperationResult, tags=["Utilisateurs"])
+@query_budget(1)
+async def bulk_update_endpoint(
+    bulk_update: BulkUserUpdate,
+    returning: bool = Query(False, description="Retourner les utilisateurs modifiés (si la base supporte RETURNING)"),
+    db: AnySession = Depends(get_session)
+):
+    """
+    ✏️ Mise à jour en masse
+    
+    Applique `values` à tous les utilisateurs correspondant à `filter`
+    (`ids`, `classe`, `is_active`) en une seule requête `UPDATE ... WHERE`.
+    """
+    try:
+        affected, rows = await bulk_update_users(
+            db, bulk_update.values.dict(exclude_unset=True),
+            returning=returning, **bulk_update.filter.dict()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    logger.info(f"✏️ Bulk updated {affected} users ({bulk_update.filter.dict(exclude_none=True)})")
+    return {"affected": affected, "users": rows}
+
+@app.patch("/users/bulk/deactivate", response_model=BulkOperationResult, tags=["Utilisateurs"])
+@query_budget(1)
+async def bulk_deactivate_endpoint(
+    selection: BulkUserFilter,
+    returning: bool = Query(False, description="Retourner les utilisateurs modifiés (si la base supporte RETURNING)"),
+    db: AnySession = Depends(get_session)
+):
+    """
+    🔒 Désactivation en masse
+    
+    Désactive en une requête les utilisateurs actifs sélectionnés par `ids` et/ou `classe`
+    (par exemple pour clôturer une promotion).
+    """
+    try:
+        affected, rows = await bulk_deactivate_users(
+            db, ids=selection.ids, classe=selection.classe, returning=returning
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    logger.info(f"🔒 Bulk deactivated {affected} users ({selection.dict(exclude_none=True)})")
+    return {"affected": affected, "users": rows}
+
+@app.post("/users/bulk/delete", response_model=BulkOperationResult, tags=["Utilisateurs"])
+@query_budget(1)
+async def bulk_delete_endpoint(
+    selection: BulkUserFilter,
+    returning: bool = Query(False, description="Retourner les utilisateurs supprimés (si la base supporte RETURNING)"),
+    db: AnySession = Depends(get_session)
+):
+    """
+    🗑️ Suppression en masse
+    
+    Supprime définitivement, en une requête `DELETE ... WHERE`, les utilisateurs
+    sélectionnés par `ids`, `classe` et/ou `is_active`.
+    """
+    try:
+        affected, rows = await bulk_delete_users(db, returning=returning, **selection.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    logger.info(f"🗑️ Bulk deleted {affected} users ({selection.dict(exclude_none=True)})")
+    return {"affected": affected, "users": rows}
+
+@app.get("/users/", response_model=LIST_RESPONSE_MODEL, tags=["Utilisateurs"])
+@query_budget(2)
 async def read_users(
-    skip: int = Query(0, ge=0, description="Nombre d'utilisateurs à ignorer"),
-    limit: int = Query(100, ge=1, le=1000, description="Nombre maximum d'utilisateurs à retourner"),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = CURSOR_QUERY,
+    skip: int = Query(0, ge=0, deprecated=True, description="Nombre d'utilisateurs à ignorer (préférer `cursor`)"),
+    limit: int = LIMIT_QUERY,
+    full: bool = FULL_QUERY,
+    db: AnySession = Depends(get_session)
 ):
     """
     📋 Lister les utilisateurs avec pagination
     
-    Retourne la liste des utilisateurs avec support de la pagination.
+    Retourne une page d'utilisateurs triés par ID. Passer `next_cursor`
+    dans `cursor` pour obtenir la page suivante (coût constant).
+    Réponse 304 si `If-None-Match` correspond à l'ETag de la collection.
     """
-    users = get_users(db, skip=skip, limit=limit)
-    logger.info(f"📋 Retrieved {len(users)} users (skip={skip}, limit={limit})")
-    return users
-
-@app.get("/users/all", response_model=List[UserResponse], tags=["Utilisateurs"])
-async def read_all_users(db: Session = Depends(get_db)):
+    validators = collection_validators(request, await get_users_version(db))
+    if is_not_modified(request, validators):
+        return not_modified_response(validators)
+    
+    page = await paginated_response(
+        lambda after_id, limit: get_users(
+            db, skip=skip if after_id is None else 0, limit=limit, after_id=after_id,
+            projection=list_projection(full)
+        ),
+        cursor, limit
+    )
+    logger.info(f"📋 Retrieved {len(page['items'])} users (skip={skip}, limit={limit})")
+    return with_validators(page_response(page, request, response, full), response, validators)
+
+@app.get("/users/all", response_model=LIST_RESPONSE_MODEL, tags=["Utilisateurs"])
+@query_budget(2)
+async def read_all_users(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = CURSOR_QUERY,
+    limit: int = LIMIT_QUERY,
+    full: bool = FULL_QUERY,
+    db: AnySession = Depends(get_session)
+):
     """
     📋 Lister tous les utilisateurs
     
-    Retourne la liste complète de tous les utilisateurs sans pagination.
+    Parcourt la table complète page par page en suivant `next_cursor`.
     """
-    users = get_all_users(db)
-    logger.info(f"📋 Retrieved all {len(users)} users")
-    return users
-
-@app.get("/users/active", response_model=List[UserResponse], tags=["Utilisateurs"])
-async def read_active_users(db: Session = Depends(get_db)):
+    validators = collection_validators(request, await get_users_version(db))
+    if is_not_modified(request, validators):
+        return not_modified_response(validators)
+    
+    page = await paginated_response(
+        lambda after_id, limit: get_users(db, limit=limit, after_id=after_id, projection=list_projection(full)),
+        cursor, limit
+    )
+    logger.info(f"📋 Retrieved {len(page['items'])} users")
+    return with_validators(page_response(page, request, response, full), response, validators)
+
+@app.get("/users/active", response_model=LIST_RESPONSE_MODEL, tags=["Utilisateurs"])
+@query_budget(2)
+async def read_active_users(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = CURSOR_QUERY,
+    limit: int = LIMIT_QUERY,
+    full: bool = FULL_QUERY,
+    db: AnySession = Depends(get_session)
+):
     """
     ✅ Lister les utilisateurs actifs
     
-    Retourne uniquement les utilisateurs avec le statut actif.
+    Retourne uniquement les utilisateurs avec le statut actif (paginé par curseur).
     """
-    users = get_active_users(db)
-    logger.info(f"✅ Retrieved {len(users)} active users")
-    return users
+    validators = collection_validators(request, await get_users_version(db, is_active=True))
+    if is_not_modified(request, validators):
+        return not_modified_response(validators)
+    
+    page = await paginated_response(
+        lambda after_id, limit: get_active_users(
+            db, after_id=after_id, limit=limit, projection=list_projection(full)
+        ),
+        cursor, limit, scope={"is_active": True}
+    )
+    logger.info(f"✅ Retrieved {len(page['items'])} active users")
+    return with_validators(page_response(page, request, response, full), response, validators)
 
 @app.get("/users/stats", tags=["Utilisateurs"])
-async def get_user_statistics(db: Session = Depends(get_db)):
+@query_budget(1)
+async def get_user_statistics(db: AnySession = Depends(get_session)):
     """
     📊 Statistiques des utilisateurs
     
     Retourne des statistiques détaillées sur les utilisateurs.
     """
     try:
-        all_users = get_all_users(db)
-        active_users = get_active_users(db)
-        
-        # Group by class
-        classes = {}
-        for user in all_users:
-            classe = user.classe
-            if classe not in classes:
-                classes[classe] = {"total": 0, "active": 0}
-            classes[classe]["total"] += 1
-            if user.is_active:
-                classes[classe]["active"] += 1
+        stats = await get_user_stats(db)
         
         return {
-            "total_users": len(all_users),
-            "active_users": len(active_users),
-            "inactive_users": len(all_users) - len(active_users),
-            "classes": classes,
+            **stats,
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/users/export", tags=["Utilisateurs"])
+@query_budget(None)
+async def export_users(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Format d'export : ndjson ou csv"),
+    classe: Optional[str] = Query(None, description="Filtrer par classe"),
+    active: Optional[bool] = Query(None, description="Filtrer par statut actif"),
+    batch_size: int = Query(1000, ge=100, le=10000, description="Nombre de lignes lues par lot"),
+):
+    """
+    📤 Exporter les utilisateurs en flux
+    
+    Diffuse toute la table en NDJSON ou CSV, lot par lot (curseur serveur) :
+    la mémoire reste constante quelle que soit la taille de la table.
+    """
+    # The session must live as long as the stream, not the request handler
+    async def generate_async():
+        async with connexion.AsyncSessionLocal() as db:
+            batches = async_crud.stream_users(db, classe=classe, is_active=active, batch_size=batch_size)
+            async for chunk in aiter_export(format, batches):
+                yield chunk
+    
+    def generate():
+        # Sync iterator: StreamingResponse consumes it in the threadpool
+        db = connexion.SessionLocal()
+        try:
+            batches = crud.stream_users(db, classe=classe, is_active=active, batch_size=batch_size)
+            yield from EXPORT_SERIALIZERS[format](batches)
+        finally:
+            db.close()
+    
+    logger.info(f"📤 Exporting users as {format} (classe='{classe}', active={active})")
+    return StreamingResponse(
+        generate_async() if USE_ASYNC_DB else generate(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'}
+    )
+
 @app.get("/users/{user_id}", response_model=UserResponse, tags=["Utilisateurs"])
-async def read_user(user_id: int, db: Session = Depends(get_db)):
+@query_budget(1)
+async def read_user(user_id: int, request: Request, response: Response, db: AnySession = Depends(get_session)):
     """
     🔍 Obtenir un utilisateur par ID
     
-    Retourne les détails d'un utilisateur spécifique par son ID.
+    Retourne les détails d'un utilisateur spécifique par son ID
+    (ETag / Last-Modified, 304 si `If-None-Match` correspond).
     """
-    db_user = get_user_by_id(db, user_id)
+    db_user = await get_user_by_id(db, user_id)
     if db_user is None:
         logger.warning(f"⚠️ User not found: ID {user_id}")
         raise HTTPException(status_code=404, detail=f"User with ID {user_id} not found")
     
+    validators = user_validators(db_user)
+    if is_not_modified(request, validators):
+        return not_modified_response(validators)
+    
     logger.info(f"🔍 Retrieved user: {db_user.email}")
-    return db_user
+    return with_validators(db_user, response, validators)
 
 @app.get("/users/email/{email}", response_model=UserResponse, tags=["Utilisateurs"])
-async def read_user_by_email(email: str, db: Session = Depends(get_db)):
+@query_budget(1)
+async def read_user_by_email(email: str, request: Request, response: Response, db: AnySession = Depends(get_session)):
     """
     📧 Obtenir un utilisateur par email
     
-    Retourne les détails d'un utilisateur spécifique par son adresse email.
+    Retourne les détails d'un utilisateur spécifique par son adresse email
+    (ETag / Last-Modified, 304 si `If-None-Match` correspond).
     """
-    db_user = get_user_by_email(db, email)
+    db_user = await get_user_by_email(db, email)
     if db_user is None:
         logger.warning(f"⚠️ User not found: {email}")
         raise HTTPException(status_code=404, detail=f"User with email '{email}' not found")
     
+    validators = user_validators(db_user)
+    if is_not_modified(request, validators):
+        return not_modified_response(validators)
+    
     logger.info(f"📧 Retrieved user: {email}")
-    return db_user
-
-@app.get("/users/class/{classe}", response_model=List[UserResponse], tags=["Utilisateurs"])
-async def read_users_by_class(classe: str, db: Session = Depends(get_db)):
+    return with_validators(db_user, response, validators)
+
+@app.get("/users/class/{classe}", response_model=LIST_RESPONSE_MODEL, tags=["Utilisateurs"])
+@query_budget(2)
+async def read_users_by_class(
+    classe: str,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = CURSOR_QUERY,
+    limit: int = LIMIT_QUERY,
+    full: bool = FULL_QUERY,
+    db: AnySession = Depends(get_session)
+):
     """
     🎓 Obtenir les utilisateurs par classe
     
-    Retourne tous les utilisateurs d'une classe spécifique.
+    Retourne les utilisateurs d'une classe spécifique (curseur sur `(classe, id)`).
+    Réponse 304 si `If-None-Match` correspond à l'ETag de la classe.
     """
-    users = get_users_by_class(db, classe)
-    logger.info(f"🎓 Retrieved {len(users)} users from class: {classe}")
-    return users
+    validators = collection_validators(request, await get_users_version(db, classe=classe))
+    if is_not_modified(request, validators):
+        return not_modified_response(validators)
+    
+    page = await paginated_response(
+        lambda after_id, limit: get_users_by_class(
+            db, classe, after_id=after_id, limit=limit, projection=list_projection(full)
+        ),
+        cursor, limit, scope={"classe": classe}
+    )
+    logger.info(f"🎓 Retrieved {len(page['items'])} users from class: {classe}")
+    return with_validators(page_response(page, request, response, full), response, validators)
 
 @app.put("/users/{user_id}", response_model=UserResponse, tags=["Utilisateurs"])
-async def update_user_endpoint(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
+@query_budget(3)
+async def update_user_endpoint(user_id: int, user_update: UserUpdate, db: AnySession = Depends(get_session)):
     """
     ✏️ Mettre à jour un utilisateur
     
     Met à jour les informations d'un utilisateur existant.
     Seuls les champs fournis seront modifiés.
     """
-    db_user = update_user(db, user_id, user_update)
+    db_user = await update_user(db, user_id, user_update)
     if db_user is None:
         logger.warning(f"⚠️ User not found for update: ID {user_id}")
         raise HTTPException(status_code=404, detail=f"User with ID {user_id} not found")
@@ -338,19 +744,20 @@ async def update_user_endpoint(user_id: int, user_update: UserUpdate, db: Sessio
     return db_user
 
 @app.delete("/users/{user_id}", tags=["Utilisateurs"])
-async def delete_user_endpoint(user_id: int, db: Session = Depends(get_db)):
+@query_budget(3)
+async def delete_user_endpoint(user_id: int, db: AnySession = Depends(get_session)):
     """
     🗑️ Supprimer un utilisateur
     
     Supprime définitivement un utilisateur de la base de données.
     """
     # Get user info before deletion for logging
-    user_to_delete = get_user_by_id(db, user_id)
+    user_to_delete = await get_user_by_id(db, user_id)
     if user_to_delete is None:
         logger.warning(f"⚠️ User not found for deletion: ID {user_id}")
         raise HTTPException(status_code=404, detail=f"User with ID {user_id} not found")
     
-    success = delete_user(db, user_id)
+    success = await delete_user(db, user_id)
     if not success:
         raise HTTPException(status_code=404, detail=f"Failed to delete user with ID {user_id}")
     
@@ -367,14 +774,15 @@ async def delete_user_endpoint(user_id: int, db: Session = Depends(get_db)):
     }
 
 @app.patch("/users/{user_id}/deactivate", response_model=UserResponse, tags=["Utilisateurs"])
-async def deactivate_user_endpoint(user_id: int, db: Session = Depends(get_db)):
+@query_budget(3)
+async def deactivate_user_endpoint(user_id: int, db: AnySession = Depends(get_session)):
     """
     🔒 Désactiver un utilisateur
     
     Désactive un utilisateur sans le supprimer (soft delete).
     L'utilisateur peut être réactivé plus tard.
     """
-    db_user = deactivate_user(db, user_id)
+    db_user = await deactivate_user(db, user_id)
     if db_user is None:
         logger.warning(f"⚠️ User not found for deactivation: ID {user_id}")
         raise HTTPException(status_code=404, detail=f"User with ID {user_id} not found")
@@ -383,7 +791,8 @@ async def deactivate_user_endpoint(user_id: int, db: Session = Depends(get_db)):
     return db_user
 
 @app.patch("/users/{user_id}/activate", response_model=UserResponse, tags=["Utilisateurs"])
-async def activate_user_endpoint(user_id: int, db: Session = Depends(get_db)):
+@query_budget(3)
+async def activate_user_endpoint(user_id: int, db: AnySession = Depends(get_session)):
     """
     🔓 Réactiver un utilisateur
     
@@ -391,7 +800,7 @@ async def activate_user_endpoint(user_id: int, db: Session = Depends(get_db)):
     """
     try:
         user_update = UserUpdate(is_active=True)
-        db_user = update_user(db, user_id, user_update)
+        db_user = await update_user(db, user_id, user_update)
         if db_user is None:
             logger.warning(f"⚠️ User not found for activation: ID {user_id}")
             raise HTTPException(status_code=404, detail=f"User with ID {user_id} not found")
@@ -404,46 +813,44 @@ async def activate_user_endpoint(user_id: int, db: Session = Depends(get_db)):
 
 # === ENDPOINTS DE RECHERCHE ===
 
-@app.get("/search/users", response_model=List[UserResponse], tags=["Recherche"])
+@app.get("/search/users", response_model=LIST_RESPONSE_MODEL, tags=["Recherche"])
+@query_budget(2)
 async def search_users(
+    request: Request,
+    response: Response,
     q: Optional[str] = Query(None, description="Terme de recherche (nom, prénom, email)"),
     classe: Optional[str] = Query(None, description="Filtrer par classe"),
     active: Optional[bool] = Query(None, description="Filtrer par statut actif"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = CURSOR_QUERY,
+    limit: int = LIMIT_QUERY,
+    full: bool = FULL_QUERY,
+    db: AnySession = Depends(get_session)
 ):
     """
     🔍 Recherche avancée d'utilisateurs
     
     Recherche des utilisateurs avec différents critères :
     
-    * **q** : Recherche dans nom, prénom et email
+    * **q** : Recherche dans nom, prénom et email (index plein texte)
     * **classe** : Filtrer par classe
     * **active** : Filtrer par statut (actif/inactif)
+    * **cursor** / **limit** : Pagination par curseur (`next_cursor`)
+    * **full** : Schéma `User` complet (avec `created_at` / `updated_at`)
     """
     try:
-        users = get_all_users(db)
-        
-        # Filter by search query
-        if q:
-            q_lower = q.lower()
-            users = [
-                user for user in users
-                if q_lower in user.nom.lower() 
-                or q_lower in user.prenom.lower() 
-                or q_lower in user.email.lower()
-            ]
-        
-        # Filter by class
-        if classe:
-            users = [user for user in users if user.classe == classe]
-        
-        # Filter by active status
-        if active is not None:
-            users = [user for user in users if user.is_active == active]
+        page = await paginated_response(
+            lambda after_id, limit: crud_search_users(
+                db, q=q, classe=classe, is_active=active, after_id=after_id, limit=limit,
+                projection=list_projection(full)
+            ),
+            cursor, limit, scope={"q": q, "classe": classe, "active": active}
+        )
         
-        logger.info(f"🔍 Search query='{q}', classe='{classe}', active={active} - Found {len(users)} users")
-        return users
+        logger.info(f"🔍 Search query='{q}', classe='{classe}', active={active} - Found {len(page['items'])} users")
+        return page_response(page, request, response, full)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error in search: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -477,28 +884,6 @@ async def internal_error_handler(request, exc):
         }
     )
 
-# === ÉVÉNEMENTS D'APPLICATION ===
-
-@app.on_event("startup")
-async def startup_event():
-    """Événements au démarrage de l'application"""
-    logger.info("🚀 M2DSIA API is starting up...")
-    
-    # Test database connection
-    if test_connection():
-        db_info = get_current_database_info()
-        logger.info(f"✅ Database connected: {db_info}")
-    else:
-        logger.error("❌ Database connection failed")
-    
-    logger.info("🎉 M2DSIA API started successfully!")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Événements à l'arrêt de l'application"""
-    logger.info("🛑 M2DSIA API is shutting down...")
-    logger.info("👋 Goodbye!")
-
 # === POINT D'ENTRÉE ===
 
 if __name__ == "__main__":
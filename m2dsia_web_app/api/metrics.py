@@ -0,0 +1,228 @@
+# api/metrics.py
+"""
+Prometheus metrics of the API, exposed at /metrics (text format 0.0.4).
+
+A minimal in-process registry (no client library): counters, gauges and
+histograms guarded by one lock each, rendered on scrape. Recorded:
+* HTTP: latency histogram per route, requests per route and status,
+  in-flight requests (api.middleware.MetricsMiddleware);
+* SQL: statement count and duration per engine, and per request
+  (before_cursor_execute / after_cursor_execute listeners, instrument_engine);
+* pools: connections checked out, overflow and checkout waits, read on scrape.
+
+Routes are labelled with their template (/users/{user_id}) and unmatched
+paths with "unmatched", so the number of series stays bounded. Values are
+per process: each worker exposes its own /metrics.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Histogram buckets (upper bounds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class Metric:
+    """
+    Base of the metric types: name, help text, label names and one value per label set
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}", *self.samples()]
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, labels: Tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value: float, labels: Tuple = ()) -> None:
+        """For totals kept elsewhere (e.g. pool statistics), copied on scrape"""
+        with self._lock:
+            self._values[labels] = value
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labels: Tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Tuple = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, the last one for +Inf; then the sum
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),))
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(total)}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+# HTTP
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by method, route and status", ("method", "route", "status"))
+HTTP_DURATION = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served")
+HTTP_DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements executed per HTTP request", ("method", "route"), STATEMENT_COUNT_BUCKETS
+)
+HTTP_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per HTTP request", ("method", "route")
+)
+
+# SQL
+DB_STATEMENTS = Counter("db_statements_total", "SQL statements executed", ("engine",))
+DB_STATEMENT_DURATION = Histogram("db_statement_duration_seconds", "SQL statement execution time", ("engine",))
+DB_ERRORS = Counter("db_errors_total", "SQL statements or connections that raised", ("engine",))
+
+# Pools (read on scrape)
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured pool size", ("engine",))
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", ("engine",))
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Overflow connections currently open", ("engine",))
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Pool checkouts", ("engine",))
+DB_POOL_WAIT = Counter("db_pool_checkout_wait_seconds_total", "Time spent waiting for a pooled connection", ("engine",))
+DB_POOL_TIMEOUTS = Counter("db_pool_checkout_timeouts_total", "Checkouts that failed or timed out", ("engine",))
+
+METRICS: List[Metric] = [
+    HTTP_REQUESTS, HTTP_DURATION, HTTP_IN_FLIGHT, HTTP_DB_STATEMENTS, HTTP_DB_TIME,
+    DB_STATEMENTS, DB_STATEMENT_DURATION, DB_ERRORS,
+    DB_POOL_SIZE, DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW, DB_POOL_CHECKOUTS, DB_POOL_WAIT, DB_POOL_TIMEOUTS,
+]
+
+class RequestStats:
+    """
+    SQL statements and time of the current request (filled by the engine
+    listeners); with record=True, every (statement, duration) as well
+    """
+    __slots__ = ("statements", "db_time", "queries")
+
+    def __init__(self, record: bool = False):
+        self.statements = 0
+        self.db_time = 0.0
+        self.queries: Optional[List[Tuple[str, float]]] = [] if record else None
+
+# Current request's SQL statistics (None outside HTTP requests)
+_request_stats: contextvars.ContextVar = contextvars.ContextVar("metrics_request_stats", default=None)
+
+def set_request_stats(stats: RequestStats) -> contextvars.Token:
+    return _request_stats.set(stats)
+
+def reset_request_stats(token: contextvars.Token) -> None:
+    _request_stats.reset(token)
+
+def observe_request(method: str, route: str, status: int, elapsed: float, stats: RequestStats) -> None:
+    """Record one finished HTTP request"""
+    HTTP_REQUESTS.inc((method, route, str(status)))
+    HTTP_DURATION.observe(elapsed, (method, route))
+    HTTP_DB_STATEMENTS.observe(stats.statements, (method, route))
+    HTTP_DB_TIME.observe(stats.db_time, (method, route))
+
+# Instrumented engines by label (pool metrics are read from them on scrape)
+_engines: Dict[str, object] = {}
+
+def instrument_engine(engine, label: str) -> None:
+    """
+    Count and time the SQL statements of an engine (sync or async), once
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    if _engines.get(label) is engine:
+        return
+    _engines[label] = engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        DB_STATEMENTS.inc((label,))
+        DB_STATEMENT_DURATION.observe(elapsed, (label,))
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_time += elapsed
+            if stats.queries is not None:
+                stats.queries.append((statement, elapsed))
+
+    @event.listens_for(engine, "handle_error")
+    def count_error(exception_context):
+        DB_ERRORS.inc((label,))
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("metrics_started"):
+            # after_cursor_execute is not called for a failed statement
+            connection.info["metrics_started"].pop()
+
+def _collect_pools() -> None:
+    for label, engine in list(_engines.items()):
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            DB_POOL_SIZE.set(pool.size(), (label,))
+            DB_POOL_CHECKED_OUT.set(pool.checkedout(), (label,))
+            DB_POOL_OVERFLOW.set(max(pool.overflow(), 0), (label,))
+        wait_stats = getattr(pool, "wait_stats", None)
+        if wait_stats is not None:
+            DB_POOL_CHECKOUTS.set(wait_stats.checkouts, (label,))
+            DB_POOL_WAIT.set(wait_stats.total_wait, (label,))
+            DB_POOL_TIMEOUTS.set(wait_stats.timeouts, (label,))
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    _collect_pools()
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,184 @@
+# api/middleware.py
+"""
+ASGI middlewares of the API.
+"""
+import time
+from http.cookies import SimpleCookie
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from api.metrics import HTTP_IN_FLIGHT, RequestStats, observe_request, reset_request_stats, set_request_stats
+from api.negotiation import COMPRESSION_MINIMUM_SIZE, COMPRESSORS, negotiate_encoding
+from api.query_budget import QUERY_DETECTOR, endpoint_budget, query_headers, report_request
+from db.routing import DB_STICKY_SECONDS, RoutingState, set_routing_state, reset_routing_state
+
+# Media types worth compressing (text-like payloads)
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/msgpack", "application/xml")
+
+class ReadYourWritesMiddleware:
+    """
+    Read-your-writes for read replicas: a client that has just written gets
+    a cookie and its reads go to the primary until the cookie expires
+    """
+
+    def __init__(self, app, cookie_name: str = "m2dsia_primary_until", sticky_seconds: float = DB_STICKY_SECONDS):
+        self.app = app
+        self.cookie_name = cookie_name
+        self.sticky_seconds = sticky_seconds
+
+    def _primary_until(self, scope) -> float:
+        for name, value in scope.get("headers", []):
+            if name == b"cookie":
+                morsel = SimpleCookie(value.decode("latin-1")).get(self.cookie_name)
+                if morsel is not None:
+                    try:
+                        return float(morsel.value)
+                    except ValueError:
+                        return 0.0
+        return 0.0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = RoutingState(prefer_primary=self._primary_until(scope) > time.time())
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and state.wrote:
+                until = time.time() + self.sticky_seconds
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{self.cookie_name}={until:.3f}; Max-Age={int(self.sticky_seconds) or 1}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        token = set_routing_state(state)
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            reset_routing_state(token)
+
+class CompressionMiddleware:
+    """
+    zstd / br / gzip compression negotiated from Accept-Encoding.
+
+    A complete body is compressed in one call when it reaches minimum_size.
+    A streamed body (more_body) is compressed chunk by chunk, each chunk
+    flushed so the client keeps receiving data as it is produced.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        def compressed_start(length=None):
+            headers = MutableHeaders(scope=start)
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            if length is None:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(length)
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # Other bytes than the identity representation
+                headers["ETag"] = "W/" + etag
+            return start
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if ("content-encoding" in headers or message["status"] in (204, 304)
+                        or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held until the first body message tells whether the body is complete
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body:
+                    if len(body) < self.minimum_size:
+                        passthrough = True
+                        await send(start)
+                        await send(message)
+                        return
+                    compressor = COMPRESSORS[encoding]()
+                    data = compressor.compress(body) + compressor.finish()
+                    await send(compressed_start(len(data)))
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                compressor = COMPRESSORS[encoding]()
+                await send(compressed_start())
+
+            data = compressor.compress(body) + (compressor.flush() if more_body else compressor.finish())
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+class MetricsMiddleware:
+    """
+    Per-request timing for /metrics: latency, status and SQL statements,
+    labelled with the matched route template ("unmatched" otherwise).
+    With detect_queries, each statement is also recorded and checked
+    against the endpoint's query budget (api/query_budget.py)
+    """
+
+    def __init__(self, app, detect_queries: bool = QUERY_DETECTOR):
+        self.app = app
+        self.detect_queries = detect_queries
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if stats.queries is not None:
+                    headers = query_headers(stats.queries, endpoint_budget(scope))
+                    message["headers"] = [*message.get("headers", []), *headers]
+            await send(message)
+
+        stats = RequestStats(record=self.detect_queries)
+        token = set_request_stats(stats)
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            reset_request_stats(token)
+            # The router stores the matched route in the (shared) scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            observe_request(scope["method"], route, status_code, elapsed, stats)
+            if stats.queries is not None:
+                report_request(scope["method"], route, stats.queries, endpoint_budget(scope))
@@ -0,0 +1,149 @@
+# api/negotiation.py
+"""
+Accept / Accept-Encoding negotiation and the response compressors.
+
+Compression codecs (the optional ones are only offered when installed):
+* gzip : zlib, always available
+* br   : `brotli` package
+* zstd : `zstandard` package
+
+Every compressor works incrementally (compress / flush / finish) so that
+streamed responses can be compressed chunk by chunk.
+
+Configuration:
+* COMPRESSION_MINIMUM_SIZE : smallest complete body worth compressing (bytes)
+* COMPRESSION_GZIP_LEVEL / COMPRESSION_BROTLI_QUALITY / COMPRESSION_ZSTD_LEVEL
+"""
+import os
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# Configuration
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+def parse_header_values(header: Optional[str]) -> List[Tuple[str, float]]:
+    """
+    Parse an Accept-like header into (value, q) pairs, in header order
+    """
+    values = []
+    for item in (header or "").split(","):
+        value, *params = [part.strip() for part in item.split(";")]
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, raw = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(raw), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        values.append((value.lower(), q))
+    return values
+
+def _media_type_q(media_type: str, accepted: Sequence[Tuple[str, float]]) -> float:
+    # The most specific matching range wins: type/subtype, then type/*, then */*
+    main_type = media_type.split("/")[0]
+    for candidate in (media_type, f"{main_type}/*", "*/*"):
+        for value, q in accepted:
+            if value == candidate:
+                return q
+    return 0.0
+
+def negotiate_media_type(accept: Optional[str], offered: Sequence[str]) -> Optional[str]:
+    """
+    Best of `offered` media types for an Accept header (first offered one
+    when the header is absent, None when nothing is acceptable)
+    """
+    if not accept:
+        return offered[0] if offered else None
+    accepted = parse_header_values(accept)
+    best, best_q = None, 0.0
+    for media_type in offered:
+        q = _media_type_q(media_type, accepted)
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
+
+class GzipCompressor:
+    """Incremental gzip stream"""
+
+    def __init__(self, level: int = COMPRESSION_GZIP_LEVEL):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+class BrotliCompressor:
+    """Incremental brotli stream"""
+
+    def __init__(self, quality: int = COMPRESSION_BROTLI_QUALITY):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+class ZstdCompressor:
+    """Incremental zstd frame"""
+
+    def __init__(self, level: int = COMPRESSION_ZSTD_LEVEL):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+# Available codecs, by server preference (on equal q): cheapest CPU per byte saved first
+COMPRESSORS: Dict[str, Callable] = {}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = ZstdCompressor
+if brotli is not None:
+    COMPRESSORS["br"] = BrotliCompressor
+COMPRESSORS["gzip"] = GzipCompressor
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Sequence[str] = tuple(COMPRESSORS)) -> Optional[str]:
+    """
+    Content-coding to use for an Accept-Encoding header (None: identity)
+    """
+    accepted = dict(parse_header_values(accept_encoding))
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress(encoding: str, data: bytes) -> bytes:
+    """Compress a complete body in one call"""
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(data) + compressor.finish()
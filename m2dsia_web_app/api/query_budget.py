@@ -0,0 +1,74 @@
+# api/query_budget.py
+"""
+Query budget and N+1 / slow-query detector (dev and tests: QUERY_DETECTOR=true).
+
+The SQL statements of each request are recorded by the engine listeners of
+api/metrics.py (MetricsMiddleware). A request is reported when:
+* it runs more statements than the budget declared on its endpoint with
+  @query_budget(n) (QUERY_DETECTOR_MAX_STATEMENTS when not declared);
+* the same statement runs QUERY_DETECTOR_REPEAT times or more (N+1);
+* a statement takes QUERY_DETECTOR_SLOW_MS or more.
+
+@query_budget(None) exempts an endpoint whose statements grow with its data
+by design (batched import, streamed export): only slow statements are reported.
+
+Reports go to the log (warning) and to the X-Query-* response headers,
+which tests/main.py checks against the declared budgets.
+"""
+import logging
+import os
+from collections import Counter
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+QUERY_DETECTOR = os.getenv("QUERY_DETECTOR", "false").lower() == "true"
+QUERY_DETECTOR_MAX_STATEMENTS = int(os.getenv("QUERY_DETECTOR_MAX_STATEMENTS", "10"))
+QUERY_DETECTOR_REPEAT = int(os.getenv("QUERY_DETECTOR_REPEAT", "5"))
+QUERY_DETECTOR_SLOW_MS = float(os.getenv("QUERY_DETECTOR_SLOW_MS", "100"))
+
+def query_budget(statements: Optional[int]):
+    """Declare the maximum number of SQL statements of an endpoint (None: unbounded)"""
+    def decorate(endpoint):
+        endpoint.query_budget = statements
+        return endpoint
+    return decorate
+
+def endpoint_budget(scope) -> Optional[int]:
+    """Budget of the endpoint matched for this request"""
+    endpoint = getattr(scope.get("route"), "endpoint", None)
+    return getattr(endpoint, "query_budget", QUERY_DETECTOR_MAX_STATEMENTS)
+
+def _short(statement: str, length: int = 120) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= length else statement[:length] + "..."
+
+def find_problems(queries: List[Tuple[str, float]], budget: Optional[int]) -> List[str]:
+    """Budget, N+1 and slow statement problems of one request"""
+    problems = []
+    if budget is not None:
+        if len(queries) > budget:
+            problems.append(f"{len(queries)} statements over a budget of {budget}")
+        for statement, count in Counter(statement for statement, _ in queries).items():
+            if count >= QUERY_DETECTOR_REPEAT:
+                problems.append(f"N+1: {count}x {_short(statement)}")
+    for statement, elapsed in queries:
+        if elapsed * 1000 >= QUERY_DETECTOR_SLOW_MS:
+            problems.append(f"slow statement ({elapsed * 1000:.0f} ms): {_short(statement)}")
+    return problems
+
+def query_headers(queries: List[Tuple[str, float]], budget: Optional[int]) -> List[Tuple[bytes, bytes]]:
+    """X-Query-Count / X-Query-Budget / X-Query-Problems response headers"""
+    return [
+        (b"x-query-count", str(len(queries)).encode()),
+        (b"x-query-budget", b"none" if budget is None else str(budget).encode()),
+        (b"x-query-problems", str(len(find_problems(queries, budget))).encode()),
+    ]
+
+def report_request(method: str, route: str, queries: List[Tuple[str, float]], budget: Optional[int]) -> List[str]:
+    """Log the problems of a finished request"""
+    problems = find_problems(queries, budget)
+    if problems:
+        logger.warning(f"🐢 {method} {route}: {len(queries)} SQL statements - " + "; ".join(problems))
+    return problems
@@ -0,0 +1,115 @@
+# api/serialization.py
+"""
+Projection and serialization of the paginated list endpoints.
+
+The crud functions select only the UserResponse columns as plain tuples
+(PROJECTION_ROWS): no created_at / updated_at, no identity-mapped ORM
+instances. By default the rows are handed to response_model=UserPage as
+dicts (cheaper to validate than attribute lookups on Row objects). With
+full=true every column is loaded and the page follows the User schema
+(UserDetailPage).
+
+Fast path (opt-in with API_FAST_SERIALIZATION=true): the page is encoded
+in one call, bypassing response_model:
+* orjson, when installed: rows are trusted as-is (typed database columns);
+* otherwise TypeAdapter(UserPage): validation + dump_json in pydantic-core.
+
+Format negotiated from the Accept header: JSON (default), CSV (next page
+cursor in X-Next-Cursor) or MessagePack when the `msgpack` package is installed.
+"""
+import os
+from typing import Any, Dict
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+from api.export import csv_chunk
+from api.negotiation import negotiate_media_type
+from db.crud import EXPORT_COLUMNS, PROJECTION_FULL, PROJECTION_ROWS
+from schemas.schemas import User, UserDetailPage, UserPage
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+FAST_SERIALIZATION = os.getenv("API_FAST_SERIALIZATION", "false").lower() == "true"
+
+_PAGE_ADAPTER = TypeAdapter(UserPage)
+_DETAIL_PAGE_ADAPTER = TypeAdapter(UserDetailPage)
+
+# Media types of the list endpoints, by server preference
+PAGE_MEDIA_TYPES = {"application/json": "json", "text/csv": "csv"}
+if msgpack is not None:
+    PAGE_MEDIA_TYPES.update({"application/msgpack": "msgpack", "application/x-msgpack": "msgpack"})
+
+def page_format(request: Request) -> str:
+    """Format of a list response negotiated from Accept (json when nothing else matches)"""
+    media_type = negotiate_media_type(request.headers.get("accept"), list(PAGE_MEDIA_TYPES))
+    return PAGE_MEDIA_TYPES.get(media_type, "json")
+
+def list_projection(full: bool = False) -> str:
+    """Projection the crud functions must use for a list endpoint"""
+    return PROJECTION_FULL if full else PROJECTION_ROWS
+
+def page_dict(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Page of EXPORT_COLUMNS rows with every row as a plain dict"""
+    return {
+        "items": [dict(zip(EXPORT_COLUMNS, row)) for row in page["items"]],
+        "next_cursor": page["next_cursor"],
+    }
+
+def page_to_json_orjson(page: Dict[str, Any]) -> bytes:
+    """Encode a page of EXPORT_COLUMNS rows with orjson"""
+    return orjson.dumps(page_dict(page))
+
+def page_to_json_adapter(page: Dict[str, Any]) -> bytes:
+    """Validate and encode a page of EXPORT_COLUMNS rows with pydantic-core"""
+    return _PAGE_ADAPTER.dump_json(_PAGE_ADAPTER.validate_python(page_dict(page)))
+
+page_to_json = page_to_json_orjson if orjson is not None else page_to_json_adapter
+
+def _detail_page(page: Dict[str, Any]) -> UserDetailPage:
+    return _DETAIL_PAGE_ADAPTER.validate_python(page, from_attributes=True)
+
+def page_to_msgpack(page: Dict[str, Any], full: bool = False) -> bytes:
+    """Encode a page as MessagePack (datetimes as ISO strings with full=True)"""
+    if full:
+        return msgpack.packb(_DETAIL_PAGE_ADAPTER.dump_python(_detail_page(page), mode="json"))
+    return msgpack.packb(page_dict(page))
+
+def page_to_csv(page: Dict[str, Any], full: bool = False) -> bytes:
+    """Encode the users of a page as CSV, header first"""
+    if not full:
+        return (csv_chunk([EXPORT_COLUMNS]) + csv_chunk(page["items"])).encode()
+    columns = EXPORT_COLUMNS + tuple(name for name in User.model_fields if name not in EXPORT_COLUMNS)
+    items = _DETAIL_PAGE_ADAPTER.dump_python(_detail_page(page), mode="json")["items"]
+    return (csv_chunk([columns]) + csv_chunk([[item[name] for name in columns] for item in items])).encode()
+
+def page_response(page: Dict[str, Any], request: Request, response: Response, full: bool = False):
+    """
+    Response of a list endpoint in the negotiated format: the page of dicts
+    (validated through response_model), or the already encoded body of the
+    full User schema, of the fast path, of CSV or of MessagePack
+    """
+    format = page_format(request)
+    if format == "csv":
+        result = Response(content=page_to_csv(page, full), media_type="text/csv")
+        if page["next_cursor"]:
+            result.headers["X-Next-Cursor"] = page["next_cursor"]
+    elif format == "msgpack":
+        result = Response(content=page_to_msgpack(page, full), media_type="application/msgpack")
+    elif full:
+        result = Response(content=_DETAIL_PAGE_ADAPTER.dump_json(_detail_page(page)), media_type="application/json")
+    elif FAST_SERIALIZATION:
+        result = Response(content=page_to_json(page), media_type="application/json")
+    else:
+        result = page_dict(page)
+    (result if isinstance(result, Response) else response).headers.add_vary_header("Accept")
+    return result
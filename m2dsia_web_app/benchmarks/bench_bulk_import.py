@@ -0,0 +1,63 @@
+# benchmarks/bench_bulk_import.py
+"""
+Throughput benchmark (rows/sec) for user imports: crud.bulk_create_users
+with several batch sizes versus the one-by-one path of POST /users/
+(get_user_by_email + create_user, one commit per user).
+
+Usage:
+    python benchmarks/bench_bulk_import.py --rows 50000 --batch-sizes 100,500,2000
+"""
+import argparse
+import os
+import time
+
+from common import print_header, create_bench_engine, make_session, parse_sizes
+
+from db.crud import bulk_create_users, create_user, get_user_by_email
+from schemas.schemas import UserCreate
+
+def make_users(count, prefix):
+    """Build `count` validated users with unique emails"""
+    return [
+        UserCreate(email=f"{prefix}{i}@isi.com", nom=f"Nom{i}", prenom=f"Prenom{i}", classe="MLOps 2025")
+        for i in range(count)
+    ]
+
+def one_by_one(db, users):
+    """Previous import path: lookup, insert, commit and refresh per user"""
+    for user in users:
+        if get_user_by_email(db, user.email) is None:
+            create_user(db, user)
+
+def run(label, func, rows):
+    """Time `func(db)` on a fresh database and print rows/sec"""
+    engine = create_bench_engine()
+    db = make_session(engine)()
+    try:
+        start = time.perf_counter()
+        func(db)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>22} | {rows:>8,} rows | {elapsed:>7.2f} s | {rows / elapsed:>10,.0f} rows/s")
+    finally:
+        db.close()
+        engine.dispose()
+        os.remove(engine.url.database)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk user import")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--baseline-rows", type=int, default=2_000,
+                        help="Rows imported one by one (the slow path is sampled on fewer rows)")
+    parser.add_argument("--batch-sizes", type=parse_sizes, default=[100, 500, 2000])
+    args = parser.parse_args()
+    
+    print_header("Bulk import throughput")
+    baseline = make_users(args.baseline_rows, "single")
+    run("one by one", lambda db: one_by_one(db, baseline), len(baseline))
+    
+    users = make_users(args.rows, "bulk")
+    for batch_size in args.batch_sizes:
+        run(f"bulk batch={batch_size}", lambda db: bulk_create_users(db, users, batch_size=batch_size), len(users))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# benchmarks/bench_compression.py
+"""
+Bytes on the wire and CPU cost of a list response, per format (JSON, CSV,
+MessagePack when installed) and per content-coding (identity, gzip, and
+br / zstd when their packages are installed), as produced by
+api/serialization.py and api/negotiation.py.
+
+Usage:
+    python benchmarks/bench_compression.py --rows 10000 --repeat 5
+"""
+import argparse
+
+from common import print_header, create_bench_engine, make_session, seed_users, measure
+from api.negotiation import COMPRESSORS, compress
+from api.serialization import msgpack, page_to_csv, page_to_json, page_to_msgpack
+from db.crud import PROJECTION_ROWS, get_users
+
+FORMATS = {"json": page_to_json, "csv": page_to_csv}
+if msgpack is not None:
+    FORMATS["msgpack"] = page_to_msgpack
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list response size and CPU per format and encoding")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_bench_engine()
+    seed_users(engine, args.rows)
+    with make_session(engine)() as db:
+        page = {"items": get_users(db, limit=args.rows, projection=PROJECTION_ROWS), "next_cursor": None}
+
+    print_header(f"List response of {args.rows:,} users: bytes on the wire and CPU per request")
+    for name, serialize in FORMATS.items():
+        body = serialize(page)
+        encode_time, _ = measure(lambda: serialize(page), args.repeat)
+        print(f"{name:>8} | identity | {len(body):>11,} B | ratio  1.00 | "
+              f"serialize {encode_time * 1000:>7.1f} ms | compress {0:>7.1f} ms")
+        for encoding in COMPRESSORS:
+            compressed = compress(encoding, body)
+            compress_time, _ = measure(lambda: compress(encoding, body), args.repeat)
+            print(f"{name:>8} | {encoding:>8} | {len(compressed):>11,} B | ratio {len(body) / len(compressed):>5.2f} | "
+                  f"serialize {encode_time * 1000:>7.1f} ms | compress {compress_time * 1000:>7.1f} ms")
+
+if __name__ == "__main__":
+    main()
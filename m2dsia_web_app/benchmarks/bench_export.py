@@ -0,0 +1,95 @@
+# benchmarks/bench_export.py
+"""
+Peak memory benchmark for the users export: streaming NDJSON export
+(crud.stream_users + api.export) versus building the full
+List[UserResponse] payload as /users/all used to do.
+
+Each mode runs in its own subprocess so that ru_maxrss (peak RSS)
+is measured independently.
+
+Usage:
+    python benchmarks/bench_export.py --size 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from common import print_header, create_bench_engine, make_session, seed_users
+
+def peak_rss_mb():
+    """Peak resident set size of this process, in MB (ru_maxrss is in KB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_child(mode, path):
+    """Export the whole table with one strategy and report timings and peak RSS"""
+    from db.crud import get_all_users, stream_users
+    from api.export import iter_ndjson
+    from schemas.schemas import UserResponse
+    
+    engine = create_bench_engine(path)
+    db = make_session(engine)()
+    baseline = peak_rss_mb()
+    
+    start = time.perf_counter()
+    first_byte = None
+    total_bytes = 0
+    
+    if mode == "stream":
+        for chunk in iter_ndjson(stream_users(db)):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            total_bytes += len(chunk.encode())
+    else:
+        users = get_all_users(db)
+        payload = json.dumps([UserResponse.model_validate(user).model_dump() for user in users])
+        first_byte = time.perf_counter() - start
+        total_bytes = len(payload.encode())
+    
+    elapsed = time.perf_counter() - start
+    db.close()
+    print(json.dumps({
+        "mode": mode,
+        "elapsed": elapsed,
+        "first_byte": first_byte,
+        "bytes": total_bytes,
+        "peak_rss_mb": peak_rss_mb(),
+        "baseline_rss_mb": baseline,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak RSS of the users export")
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--child", choices=["stream", "full"], help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        run_child(args.child, args.db)
+        return
+    
+    print_header(f"Users export: streaming vs full list ({args.size:,} rows)")
+    engine = create_bench_engine()
+    path = engine.url.database
+    try:
+        seed_users(engine, args.size)
+        engine.dispose()
+        
+        for mode in ("full", "stream"):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, "--db", path],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>6} | peak RSS {result['peak_rss_mb']:>8.1f} MB "
+                  f"(+{result['peak_rss_mb'] - result['baseline_rss_mb']:.1f} MB) | "
+                  f"first byte {result['first_byte'] * 1000:>8.1f} ms | "
+                  f"total {result['elapsed']:>6.2f} s | {result['bytes'] / 1e6:.1f} MB")
+    finally:
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_logging.py
+"""
+Request latency benchmark for the logging pipeline (logger/filters.py):
+logging disabled, handlers called synchronously on the request path, and
+the background QueueHandler / QueueListener pipeline.
+
+Each mode runs in its own subprocess (logging is process-wide) on a fresh
+SQLite database, and times GET /users/{id} and GET /users/ requests.
+--sql also logs every SQL statement (sqlalchemy.engine at INFO, as the
+former echo=True did).
+
+Usage:
+    python benchmarks/bench_logging.py --requests 2000 --sql
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import print_header
+
+APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+MODES = ("off", "sync", "async")
+
+def percentile(durations, q):
+    """q-th percentile of a sorted list of durations"""
+    return durations[min(len(durations) - 1, int(len(durations) * q))]
+
+def run_child(mode, requests, sql):
+    """Time `requests` API calls with the logging mode of this process"""
+    import logging
+    from fastapi.testclient import TestClient
+    from api.main import app
+
+    if mode == "off":
+        logging.disable(logging.CRITICAL)
+    if sql:
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    durations = []
+    with TestClient(app) as client:
+        client.post("/users/bulk", json=[
+            {"email": f"bench{i}@isi.com", "nom": f"Nom{i}", "prenom": f"Prenom{i}", "classe": "MLOps 2025"}
+            for i in range(100)
+        ])
+        for i in range(requests):
+            path = f"/users/{i % 100 + 1}" if i % 2 else "/users/?limit=20"
+            start = time.perf_counter()
+            client.get(path)
+            durations.append(time.perf_counter() - start)
+
+    durations.sort()
+    print(json.dumps({
+        "mode": mode,
+        "mean": statistics.mean(durations),
+        "p50": percentile(durations, 0.50),
+        "p95": percentile(durations, 0.95),
+        "p99": percentile(durations, 0.99),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark request latency with logging on and off")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sql", action="store_true", help="log every SQL statement")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.requests, args.sql)
+        return
+
+    print_header(f"Request latency by logging mode ({args.requests} requests{', SQL logged' if args.sql else ''})")
+    for mode in MODES:
+        workdir = tempfile.mkdtemp(prefix="m2dsia_bench_logging_")
+        env = dict(os.environ, PYTHONPATH=APP_ROOT, USE_AWS_RDS="false", LOG_ASYNC=str(mode == "async").lower())
+        env.pop("DATABASE_URL", None)
+        command = [sys.executable, os.path.abspath(__file__), "--child", mode, "--requests", str(args.requests)]
+        if args.sql:
+            command.append("--sql")
+        try:
+            # Console output goes to a pipe, as under a process manager
+            output = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True, check=True).stdout
+        finally:
+            shutil.rmtree(workdir)
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>6} | mean {result['mean'] * 1000:>7.3f} ms | p50 {result['p50'] * 1000:>7.3f} ms | "
+              f"p95 {result['p95'] * 1000:>7.3f} ms | p99 {result['p99'] * 1000:>7.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_migration.py
+"""
+Users migration throughput (rows/s) between two SQLite files: the former
+row-by-row copy of setup_aws_database.py (SELECT COUNT(*) + single-row
+INSERT per user) vs db/migration.py (keyset chunks, multi-row INSERT
+executemany, parallel writers).
+
+SQLite serializes writers, so the worker count mostly matters against MySQL.
+
+Usage:
+    python benchmarks/bench_migration.py --rows 50000 --workers 1,4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from common import print_header, create_bench_engine, seed_users, parse_sizes
+from db.engine import build_engine
+from db.migration import migrate_users
+
+def legacy_migrate(source, target):
+    """Row-by-row copy, as done before db/migration.py"""
+    with source.connect() as conn:
+        users = conn.execute(text("SELECT email, nom, prenom, classe FROM users")).fetchall()
+    with target.begin() as conn:
+        for email, nom, prenom, classe in users:
+            if conn.execute(text("SELECT COUNT(*) FROM users WHERE email = :email"), {"email": email}).scalar() == 0:
+                conn.execute(
+                    text("INSERT INTO users (email, nom, prenom, classe) VALUES (:email, :nom, :prenom, :classe)"),
+                    {"email": email, "nom": nom, "prenom": prenom, "classe": classe}
+                )
+    return len(users)
+
+def fresh_target(directory, name):
+    path = os.path.join(directory, f"{name}.db")
+    create_bench_engine(path).dispose()
+    return build_engine(f"sqlite:///{path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the users migration")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--workers", type=parse_sizes, default=[1, 4])
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="m2dsia_migration_")
+    seed_users(create_bench_engine(os.path.join(directory, "source.db")), args.rows)
+    source = build_engine(f"sqlite:///{os.path.join(directory, 'source.db')}")
+
+    print_header(f"Migration of {args.rows:,} users (SQLite -> SQLite)")
+    target = fresh_target(directory, "legacy")
+    start = time.perf_counter()
+    count = legacy_migrate(source, target)
+    elapsed = time.perf_counter() - start
+    print(f"{'row by row':>22} | {elapsed:>7.2f} s | {count / elapsed:>10,.0f} rows/s")
+
+    for workers in args.workers:
+        target = fresh_target(directory, f"chunked_{workers}")
+        result = migrate_users(
+            source, target, chunk_size=args.chunk_size, workers=workers, checkpoint_path=None
+        )
+        print(f"{f'chunks x{workers} workers':>22} | {result['seconds']:>7.2f} s | {result['rows_per_second']:>10,.0f} rows/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/bench_redaction.py
+"""
+Micro-benchmark of SensitiveDataFilter (logger/filters.py) in records/sec,
+against the former implementation (getMessage() then one lowercase scan
+per keyword, redacting to the end of the message).
+
+Usage:
+    python benchmarks/bench_redaction.py --records 100000
+"""
+import argparse
+import logging
+import time
+
+from common import print_header
+from logger.filters import SensitiveDataFilter
+
+class LegacySensitiveDataFilter(logging.Filter):
+    """Former filter, kept here as the baseline"""
+
+    def __init__(self):
+        super().__init__()
+        self.sensitive_keywords = [
+            'password', 'pwd', 'secret', 'token', 'key', 'auth',
+            'credential', 'session', 'cookie', 'authorization'
+        ]
+
+    def filter(self, record):
+        message = str(record.getMessage())
+        for keyword in self.sensitive_keywords:
+            if keyword.lower() in message.lower():
+                record.msg = message.replace(
+                    message[message.lower().find(keyword.lower()):],
+                    '***REDACTED***'
+                )
+                break
+        return True
+
+# (msg, args, extra) of each record mix
+WORKLOADS = {
+    "clean f-string": ("✅ Retrieved user: Jean Dupont (jean.dupont@isi.com)", None, {}),
+    "secret in message": ("Connecting with user=root password=rootM2dsia host=db.local", None, {}),
+    "args": ("Login for %s with token=%s from %s", ("jean.dupont@isi.com", "abc.def.ghi", "10.0.0.1"), {}),
+    "extra fields": ("Request handled", None, {"path": "/users/1", "status": 200, "session_id": "s3cr3t"}),
+}
+
+def make_records(msg, args, extra, count):
+    records = []
+    for _ in range(count):
+        record = logging.LogRecord("api.main", logging.INFO, __file__, 0, msg, args, None)
+        record.__dict__.update(extra)
+        records.append(record)
+    return records
+
+def records_per_second(log_filter, workload, count, repeat):
+    """Best of `repeat` runs; records are built outside of the timed loop"""
+    best = float("inf")
+    for _ in range(repeat):
+        records = make_records(*workload, count)
+        start = time.perf_counter()
+        for record in records:
+            log_filter.filter(record)
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark log redaction throughput")
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print_header(f"SensitiveDataFilter throughput ({args.records:,} records)")
+    filters = {"legacy": LegacySensitiveDataFilter(), "regex": SensitiveDataFilter()}
+    for name, workload in WORKLOADS.items():
+        rates = {label: records_per_second(f, workload, args.records, args.repeat) for label, f in filters.items()}
+        print(f"{name:>18} | legacy {rates['legacy']:>12,.0f} rec/s | "
+              f"regex {rates['regex']:>12,.0f} rec/s | x{rates['regex'] / rates['legacy']:.2f}")
+
+if __name__ == "__main__":
+    main()
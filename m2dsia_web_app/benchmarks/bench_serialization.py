@@ -0,0 +1,83 @@
+# benchmarks/bench_serialization.py
+"""
+Throughput benchmark (rows/sec) of the list endpoints response path, from
+the query to the JSON body:
+* orm     : full User entities validated through response_model=UserPage
+            (from_attributes) then jsonable_encoder + json.dumps, as FastAPI does
+* rows    : UserResponse columns as tuples (PROJECTION_ROWS) turned into
+            dicts, then the same response_model path (default)
+* adapter : UserResponse columns as tuples + TypeAdapter(UserPage)
+* orjson  : UserResponse columns as tuples + orjson (when installed)
+
+Both the fetch and the serialization are timed, separately.
+
+Usage:
+    python benchmarks/bench_serialization.py --sizes 1000,10000 --repeat 5
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from common import print_header, create_bench_engine, make_session, seed_users, parse_sizes
+from api.serialization import orjson, page_dict, page_to_json_adapter, page_to_json_orjson
+from db.crud import PROJECTION_FULL, PROJECTION_ROWS, get_users
+from schemas.schemas import UserPage
+
+RESPONSE_FIELD = create_response_field(name="Response_read_all_users", type_=UserPage)
+
+def serialize_orm(page):
+    """Default path: response_model validation, then JSONResponse rendering"""
+    content = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=page))
+    return JSONResponse(content).body
+
+STRATEGIES = {
+    "orm": (PROJECTION_FULL, serialize_orm),
+    "rows": (PROJECTION_ROWS, lambda page: serialize_orm(page_dict(page))),
+    "adapter": (PROJECTION_ROWS, page_to_json_adapter),
+}
+if orjson is not None:
+    STRATEGIES["orjson"] = (PROJECTION_ROWS, page_to_json_orjson)
+
+def run_strategy(Session, size, projection, serialize, repeat):
+    """Median fetch and serialization durations for one page of `size` users"""
+    fetch_times, serialize_times = [], []
+    body = b""
+    for _ in range(repeat):
+        # Fresh session: no identity map carried over between runs
+        with Session() as db:
+            start = time.perf_counter()
+            users = get_users(db, limit=size, projection=projection)
+            fetched = time.perf_counter()
+            body = serialize({"items": users, "next_cursor": None})
+            fetch_times.append(fetched - start)
+            serialize_times.append(time.perf_counter() - fetched)
+    return sorted(fetch_times)[len(fetch_times) // 2], sorted(serialize_times)[len(serialize_times) // 2], body
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list endpoint serialization throughput")
+    parser.add_argument("--sizes", default="1000,10000", help="page sizes (rows per response)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sizes = parse_sizes(args.sizes)
+    engine = create_bench_engine()
+    seed_users(engine, max(sizes))
+    Session = make_session(engine)
+
+    for size in sizes:
+        print_header(f"List response serialization ({size:,} rows)")
+        reference = None
+        for name, (projection, serialize) in STRATEGIES.items():
+            fetch, encode, body = run_strategy(Session, size, projection, serialize, args.repeat)
+            # Every strategy must produce the same payload as the default path
+            reference = reference or UserPage.model_validate_json(body)
+            assert UserPage.model_validate_json(body) == reference, f"{name}: payload differs"
+            print(f"{name:>8} | fetch {fetch * 1000:>8.1f} ms | serialize {encode * 1000:>8.1f} ms | "
+                  f"{size / encode:>12,.0f} rows/s serialized | {size / (fetch + encode):>12,.0f} rows/s end to end")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/bench_startup.py
+"""
+Cold start benchmark: time to import api.main and to get the application
+ready, for each database selection scenario.
+
+Phases, each measured in a fresh interpreter:
+* import   : `import api.main` only (engines are created lazily)
+* eager    : import + blocking engine selection (DNS/TCP probe, what the
+             module import used to do)
+* lifespan : import + FastAPI lifespan (async probe, tables, first request)
+
+Scenarios:
+* sqlite     : USE_AWS_RDS=false
+* rds-cold   : USE_AWS_RDS=true, no cached fallback decision
+* rds-cached : USE_AWS_RDS=true, fallback decision cached by a previous start
+               (DB_FALLBACK_CACHE_TTL=300)
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import print_header
+
+APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PHASES = ("import", "eager", "lifespan")
+SCENARIOS = ("sqlite", "rds-cold", "rds-cached")
+
+def run_child(phase):
+    """Start the application up to `phase` and report the elapsed time"""
+    start = time.perf_counter()
+    from api.main import app
+    from db import connexion
+
+    if phase == "eager":
+        connexion.get_engine()
+    elif phase == "lifespan":
+        from fastapi.testclient import TestClient
+        with TestClient(app) as client:
+            client.get("/users/", params={"limit": 1})
+
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "phase": phase,
+        "elapsed": elapsed,
+        "backend": connexion._engine.dialect.name if connexion._engine is not None else None,
+    }))
+
+def scenario_env(scenario, cache_file):
+    """Environment of the child process for a scenario"""
+    env = dict(os.environ, PYTHONPATH=APP_ROOT, DB_FALLBACK_CACHE_FILE=cache_file)
+    env.pop("DATABASE_URL", None)
+    env["USE_AWS_RDS"] = "false" if scenario == "sqlite" else "true"
+    # The fallback cache is off by default: only the rds-cached scenario enables it
+    env["DB_FALLBACK_CACHE_TTL"] = "300" if scenario == "rds-cached" else "0"
+    return env
+
+def run_phase(phase, scenario, repeat, workdir):
+    """Median and min start time of `phase` over `repeat` fresh interpreters"""
+    cache_file = os.path.join(workdir, "fallback.json")
+    durations = []
+    backend = None
+
+    if scenario == "rds-cached" and not os.path.exists(cache_file):
+        # Warm-up start that records the fallback decision (when RDS is unreachable)
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "eager"],
+            cwd=workdir, env=scenario_env(scenario, cache_file), capture_output=True, check=True
+        )
+
+    for _ in range(repeat):
+        if scenario == "rds-cold" and os.path.exists(cache_file):
+            os.remove(cache_file)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", phase],
+            cwd=workdir, env=scenario_env(scenario, cache_file),
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        durations.append(result["elapsed"])
+        backend = result["backend"]
+
+    return statistics.median(durations), min(durations), backend
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API cold start")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--child", choices=PHASES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    print_header(f"API cold start ({args.repeat} runs per phase)")
+    workdir = tempfile.mkdtemp(prefix="m2dsia_bench_startup_")
+    try:
+        for scenario in args.scenarios.split(","):
+            for phase in PHASES:
+                median, best, backend = run_phase(phase, scenario, args.repeat, workdir)
+                print(f"{scenario:>10} | {phase:>8} | median {median * 1000:>8.1f} ms | "
+                      f"min {best * 1000:>8.1f} ms | engine {backend or '-'}")
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main()
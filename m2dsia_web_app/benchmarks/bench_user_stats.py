@@ -0,0 +1,76 @@
+# benchmarks/bench_user_stats.py
+"""
+Regression benchmark for /users/stats and /info statistics:
+single GROUP BY aggregate (crud.get_user_stats) versus the previous
+path (get_all_users + get_active_users + grouping in Python).
+
+Usage:
+    python benchmarks/bench_user_stats.py --sizes 10000,100000,1000000
+"""
+import argparse
+import os
+
+from common import print_header, create_bench_engine, make_session, seed_users, measure, parse_sizes
+
+from db.crud import get_all_users, get_active_users, get_user_stats
+
+def legacy_user_stats(db):
+    """Statistics as computed before get_user_stats (two full loads)"""
+    all_users = get_all_users(db)
+    active_users = get_active_users(db)
+    
+    classes = {}
+    for user in all_users:
+        classe = user.classe
+        if classe not in classes:
+            classes[classe] = {"total": 0, "active": 0}
+        classes[classe]["total"] += 1
+        if user.is_active:
+            classes[classe]["active"] += 1
+    
+    return {
+        "total_users": len(all_users),
+        "active_users": len(active_users),
+        "inactive_users": len(all_users) - len(active_users),
+        "classes": classes
+    }
+
+def run(size, repeat):
+    """Benchmark both implementations on a table of `size` users"""
+    engine = create_bench_engine()
+    SessionLocal = make_session(engine)
+    try:
+        seed_users(engine, size)
+        
+        def call(func):
+            db = SessionLocal()
+            try:
+                return func(db)
+            finally:
+                db.close()
+        
+        # Both paths must agree before we compare timings
+        assert call(get_user_stats) == call(legacy_user_stats), "Statistics mismatch"
+        
+        legacy_median, _ = measure(lambda: call(legacy_user_stats), repeat)
+        aggregate_median, _ = measure(lambda: call(get_user_stats), repeat)
+        
+        print(f"{size:>10,} rows | legacy {legacy_median * 1000:>10.1f} ms | "
+              f"aggregate {aggregate_median * 1000:>8.1f} ms | "
+              f"speedup x{legacy_median / aggregate_median:,.0f}")
+    finally:
+        engine.dispose()
+        os.remove(engine.url.database)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark user statistics queries")
+    parser.add_argument("--sizes", type=parse_sizes, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    print_header("User statistics: GROUP BY vs full table loads")
+    for size in args.sizes:
+        run(size, args.repeat)
+
+if __name__ == "__main__":
+    main()
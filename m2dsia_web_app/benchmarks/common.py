@@ -0,0 +1,83 @@
+# benchmarks/common.py
+"""
+Shared helpers for the benchmark scripts: temporary SQLite database,
+bulk seeding of the users table and timing utilities.
+"""
+import os
+import sys
+import random
+import statistics
+import tempfile
+import time
+
+# Add the project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Benchmarks never need AWS RDS: avoid the network probe in db.connexion
+os.environ.setdefault("USE_AWS_RDS", "false")
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from db.connexion import Base
+from models.models import User as UserModel
+
+DEFAULT_CLASSES = ["MLOps 2025", "MLOps 2026", "Cloud Computing 2025", "Data Science 2025", "IA 2026"]
+
+def print_header(title):
+    """Print formatted header"""
+    print(f"\n{'='*60}")
+    print(f"📊 {title}")
+    print(f"{'='*60}")
+
+def create_bench_engine(path=None):
+    """
+    Create a SQLite engine on a temporary file with the users schema
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="m2dsia_bench_", suffix=".db")
+        os.close(fd)
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+def make_session(engine):
+    """Create a session factory bound to the benchmark engine"""
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def seed_users(engine, count, classes=DEFAULT_CLASSES, active_ratio=0.9, batch_size=10000, seed=42):
+    """
+    Bulk insert `count` synthetic users (multi-row executemany, one commit per batch)
+    """
+    rng = random.Random(seed)
+    for offset in range(0, count, batch_size):
+        rows = [
+            {
+                "email": f"user{i}@isi.com",
+                "nom": f"Nom{i}",
+                "prenom": f"Prenom{i}",
+                "classe": rng.choice(classes),
+                "is_active": rng.random() < active_ratio,
+            }
+            for i in range(offset, min(offset + batch_size, count))
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(UserModel), rows)
+
+def measure(func, repeat=5, setup=None):
+    """
+    Run `func` `repeat` times and return (median, min) durations in seconds.
+    When given, `setup()` runs untimed before each call and its result is passed to `func`.
+    """
+    durations = []
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        func(*args)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations), min(durations)
+
+def parse_sizes(value):
+    """Parse a comma-separated list of table sizes (e.g. '10000,100000')"""
+    return [int(size) for size in value.split(",") if size]
@@ -0,0 +1,143 @@
+# benchmarks/load_test.py
+"""
+HTTP load test of the users API: `--concurrency` clients send requests
+drawn from a weighted endpoint mix for `--duration` seconds (or until
+`--requests`), then latency p50 / p95 / p99 and requests/s are reported
+per route.
+
+Route templates are filled from users sampled at start-up (GET /users/):
+{id}, {email}, {classe} and {q} (a last name); {n} is a unique number,
+for the POST bodies. The endpoint mix and the draws are seeded.
+
+Fill the database first (e.g. python -m db.synthetic --rows 1000000),
+start the API, then:
+    python benchmarks/load_test.py --url http://localhost:8000 --concurrency 32 --duration 30
+    python benchmarks/load_test.py --in-process --mix "GET /users/{id}=1"
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+from common import print_header
+
+DEFAULT_MIX = (
+    "GET /users/{id}=30,"
+    "GET /users/email/{email}=10,"
+    "GET /users/?limit=50=20,"
+    "GET /users/class/{classe}?limit=50=10,"
+    "GET /users/active?limit=50=5,"
+    "GET /search/users?q={q}&limit=20=10,"
+    "GET /users/stats=5,"
+    "GET /health/ready=5,"
+    "POST /users/=5"
+)
+
+def parse_mix(value: str) -> List[Tuple[str, str, float]]:
+    """Parse 'GET /users/{id}=30,POST /users/=5' into (method, path, weight)"""
+    mix = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        route, _, weight = item.strip().rpartition("=")
+        method, _, path = route.partition(" ")
+        mix.append((method.upper(), path, float(weight)))
+    return mix
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(math.ceil(fraction * len(sorted_values)) - 1, 0)]
+
+async def sample_users(client: httpx.AsyncClient, size: int = 200) -> List[Dict]:
+    response = await client.get("/users/", params={"limit": size})
+    response.raise_for_status()
+    users = response.json()["items"]
+    if not users:
+        raise SystemExit("❌ No users to sample: fill the database first (python -m db.synthetic)")
+    return users
+
+async def run_load(client: httpx.AsyncClient, mix, concurrency: int, duration: float, max_requests: int, seed: int):
+    users = await sample_users(client)
+    rng = random.Random(seed)
+    routes = [f"{method} {path}" for method, path, _ in mix]
+    weights = [weight for _, _, weight in mix]
+    latencies: Dict[str, List[float]] = {route: [] for route in routes}
+    errors: Dict[str, int] = {route: 0 for route in routes}
+    counter = iter(range(max_requests or 10 ** 12))
+    deadline = time.perf_counter() + duration
+
+    async def client_loop():
+        for n in counter:
+            if time.perf_counter() >= deadline:
+                return
+            index = rng.choices(range(len(mix)), weights=weights)[0]
+            method, path, _ = mix[index]
+            user = rng.choice(users)
+            url = path.format(id=user["id"], email=user["email"], classe=user["classe"], q=user["nom"], n=n)
+            body = None
+            if method == "POST":
+                body = {"email": f"load.{seed}.{n}.{time.time_ns()}@isi.com", "nom": "Load", "prenom": "Test", "classe": user["classe"]}
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies[routes[index]].append(time.perf_counter() - started)
+            errors[routes[index]] += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+def print_report(latencies, errors, elapsed: float) -> None:
+    print(f"{'route':<42} | {'requests':>8} | {'errors':>6} | {'req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8}")
+    everything = []
+    for route, values in latencies.items():
+        if not values:
+            continue
+        values.sort()
+        everything.extend(values)
+        print(f"{route[:42]:<42} | {len(values):>8,} | {errors[route]:>6,} | {len(values) / elapsed:>8,.1f} | "
+              f"{percentile(values, 0.50) * 1000:>8.1f} | {percentile(values, 0.95) * 1000:>8.1f} | {percentile(values, 0.99) * 1000:>8.1f}")
+    everything.sort()
+    print(f"{'total':<42} | {len(everything):>8,} | {sum(errors.values()):>6,} | {len(everything) / elapsed:>8,.1f} | "
+          f"{percentile(everything, 0.50) * 1000:>8.1f} | {percentile(everything, 0.95) * 1000:>8.1f} | {percentile(everything, 0.99) * 1000:>8.1f}")
+
+async def main_async(args) -> None:
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.in_process:
+        from api.main import app
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits) as client:
+                results = await run_load(client, mix, args.concurrency, args.duration, args.requests, args.seed)
+    else:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+            results = await run_load(client, mix, args.concurrency, args.duration, args.requests, args.seed)
+
+    target = "in-process app" if args.in_process else args.url
+    print_header(f"Load test: {target}, {args.concurrency} clients, {results[2]:.1f}s")
+    print_report(*results)
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test of the users API (latency percentiles per route)")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="Drive api.main:app through ASGI instead of a server")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0: duration only)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted endpoint mix: 'METHOD /path=weight,...'")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
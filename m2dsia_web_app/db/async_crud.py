@@ -0,0 +1,223 @@
+# db/async_crud.py
+"""
+Awaitable versions of every function in db/crud.py.
+
+Each function accepts either an AsyncSession (USE_ASYNC_DB=true) or a
+sync Session:
+* AsyncSession: the crud function runs through AsyncSession.run_sync,
+  so queries go through the async driver (aiosqlite / aiomysql);
+* Session: the crud function runs in the threadpool, so a blocking
+  query never stalls the event loop.
+
+The SQL therefore stays defined once, in db/crud.py.
+"""
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from db import crud
+from models.models import User as UserModel
+from schemas.schemas import UserCreate, UserUpdate
+
+AnySession = Union[AsyncSession, Session]
+
+async def run_crud(func: Callable, db: AnySession, *args, **kwargs):
+    """
+    Run a sync crud function without blocking the event loop
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(func, *args, **kwargs)
+    return await run_in_threadpool(func, db, *args, **kwargs)
+
+async def create_user(db: AnySession, user: UserCreate) -> UserModel:
+    """
+    Create a new user in the database
+    """
+    return await run_crud(crud.create_user, db, user)
+
+async def get_user_by_id(db: AnySession, user_id: int) -> Optional[UserModel]:
+    """
+    Get a user by ID
+    """
+    return await run_crud(crud.get_user_by_id, db, user_id)
+
+async def get_user_by_email(db: AnySession, email: str) -> Optional[UserModel]:
+    """
+    Get a user by email
+    """
+    return await run_crud(crud.get_user_by_email, db, email)
+
+async def get_users(
+    db: AnySession,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    projection: str = crud.PROJECTION_FULL
+) -> List[UserModel]:
+    """
+    Get all users with pagination
+    """
+    return await run_crud(crud.get_users, db, skip=skip, limit=limit, after_id=after_id, projection=projection)
+
+async def get_all_users(db: AnySession) -> List[UserModel]:
+    """
+    Get all users
+    """
+    return await run_crud(crud.get_all_users, db)
+
+async def update_user(db: AnySession, user_id: int, user_update: UserUpdate) -> Optional[UserModel]:
+    """
+    Update a user
+    """
+    return await run_crud(crud.update_user, db, user_id, user_update)
+
+async def delete_user(db: AnySession, user_id: int) -> bool:
+    """
+    Delete a user
+    """
+    return await run_crud(crud.delete_user, db, user_id)
+
+async def get_users_by_class(
+    db: AnySession,
+    classe: str,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    projection: str = crud.PROJECTION_FULL
+) -> List[UserModel]:
+    """
+    Get users by class
+    """
+    return await run_crud(
+        crud.get_users_by_class, db, classe, after_id=after_id, limit=limit, projection=projection
+    )
+
+async def get_active_users(
+    db: AnySession,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    projection: str = crud.PROJECTION_FULL
+) -> List[UserModel]:
+    """
+    Get only active users
+    """
+    return await run_crud(crud.get_active_users, db, after_id=after_id, limit=limit, projection=projection)
+
+async def deactivate_user(db: AnySession, user_id: int) -> Optional[UserModel]:
+    """
+    Deactivate a user instead of deleting
+    """
+    return await run_crud(crud.deactivate_user, db, user_id)
+
+async def search_users(
+    db: AnySession,
+    q: Optional[str] = None,
+    classe: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    after_id: Optional[int] = None,
+    limit: int = 100,
+    projection: str = crud.PROJECTION_FULL
+) -> List[UserModel]:
+    """
+    Search users with all filters composed into a single SQL statement
+    """
+    return await run_crud(
+        crud.search_users, db, q=q, classe=classe, is_active=is_active,
+        after_id=after_id, limit=limit, projection=projection
+    )
+
+async def get_user_stats(db: AnySession) -> Dict[str, Any]:
+    """
+    Get user totals and per-class breakdown from a single GROUP BY query
+    """
+    return await run_crud(crud.get_user_stats, db)
+
+async def get_user_counts(db: AnySession) -> Dict[str, int]:
+    """
+    Total / active / inactive users from the incremental counts cache
+    """
+    return await run_crud(crud.get_user_counts, db)
+
+async def bulk_create_users(
+    db: AnySession, users: Sequence[UserCreate], batch_size: int = 500, on_conflict: str = "skip"
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Insert users in batches of multi-row INSERT statements
+    """
+    return await run_crud(crud.bulk_create_users, db, users, batch_size=batch_size, on_conflict=on_conflict)
+
+async def bulk_update_users(
+    db: AnySession,
+    values: Dict[str, Any],
+    ids: Optional[List[int]] = None,
+    classe: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    returning: bool = False
+) -> Tuple[int, Optional[List[Any]]]:
+    """
+    Update every matching user with one UPDATE ... WHERE statement
+    """
+    return await run_crud(
+        crud.bulk_update_users, db, values, ids=ids, classe=classe, is_active=is_active, returning=returning
+    )
+
+async def bulk_deactivate_users(
+    db: AnySession, ids: Optional[List[int]] = None, classe: Optional[str] = None, returning: bool = False
+) -> Tuple[int, Optional[List[Any]]]:
+    """
+    Deactivate every matching active user in one statement
+    """
+    return await run_crud(crud.bulk_deactivate_users, db, ids=ids, classe=classe, returning=returning)
+
+async def bulk_delete_users(
+    db: AnySession,
+    ids: Optional[List[int]] = None,
+    classe: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    returning: bool = False
+) -> Tuple[int, Optional[List[Any]]]:
+    """
+    Delete every matching user with one DELETE ... WHERE statement
+    """
+    return await run_crud(
+        crud.bulk_delete_users, db, ids=ids, classe=classe, is_active=is_active, returning=returning
+    )
+
+async def get_users_version(
+    db: AnySession, classe: Optional[str] = None, is_active: Optional[bool] = None
+) -> Tuple[int, Optional[datetime], Optional[datetime]]:
+    """
+    Version of a users collection: (count, max(updated_at), database time)
+    """
+    return await run_crud(crud.get_users_version, db, classe=classe, is_active=is_active)
+
+async def paginate(
+    fetch: Callable[..., Awaitable[List[UserModel]]],
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    scope: Optional[Dict[str, Any]] = None
+) -> Tuple[List[UserModel], Optional[str]]:
+    """
+    Fetch one keyset page and the cursor of the next one (async fetch)
+    """
+    after_id = crud.cursor_after_id(cursor, scope)
+    users = await fetch(after_id=after_id, limit=limit + 1)
+    return crud.page_with_cursor(users, limit, scope)
+
+async def stream_users(
+    db: AsyncSession,
+    classe: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    batch_size: int = 1000
+) -> AsyncIterator[Sequence[Tuple]]:
+    """
+    Stream users as batches of plain tuples through an async server-side cursor
+    """
+    result = await db.stream(crud.export_statement(classe, is_active, batch_size))
+    try:
+        async for partition in result.partitions():
+            yield partition
+    finally:
+        await result.close()
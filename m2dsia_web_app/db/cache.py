@@ -0,0 +1,296 @@
+# db/cache.py
+"""
+Read-through cache for user lookups (crud.get_user_by_id / get_user_by_email).
+
+Backends, selected with USER_CACHE_BACKEND:
+* lru   : in-process LRU with TTL (default)
+* redis : any Redis-compatible client (redis-py, fakeredis, ...) at REDIS_URL
+* none  : cache disabled
+
+Users are cached as plain column dicts, never as ORM instances, so an
+entry can be shared between sessions, threads and processes.
+
+UserCounts keeps the total / active user counts of /info up to date from
+the crud write functions, so they are computed by one query at most.
+"""
+import json
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "lru").lower()
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+DATETIME_FIELDS = ("created_at", "updated_at")
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry TTL
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class RedisCache:
+    """
+    Cache on any Redis-compatible client (get / set(ex=) / delete / scan_iter)
+    """
+
+    def __init__(self, client, ttl: float = 60, prefix: str = "m2dsia:user:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        for field in DATETIME_FIELDS:
+            if value.get(field):
+                value[field] = datetime.fromisoformat(value[field])
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.client.set(self.prefix + key, json.dumps(value, default=_json_default), ex=max(1, int(self.ttl)))
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+def _json_default(value):
+    """Serialize datetimes for the Redis backend"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+class UserCache:
+    """
+    User cache keyed by id and by email, with hit/miss counters
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            # A cache outage must never fail the request: fall back to the database
+            self.errors += 1
+            logger.warning(f"⚠️ User cache read failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def get_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return self._get(f"id:{user_id}")
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return self._get(f"email:{email}")
+
+    def store(self, data: Dict[str, Any]) -> None:
+        """Cache a user under both its id and its email"""
+        if not self.enabled:
+            return
+        try:
+            self.backend.set(f"id:{data['id']}", data)
+            self.backend.set(f"email:{data['email']}", data)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ User cache write failed: {e}")
+
+    def invalidate(self, user_id: Optional[int] = None, *emails: Optional[str]) -> None:
+        """Drop the cached entries of a user (pass old and new emails on change)"""
+        if not self.enabled:
+            return
+        keys = [f"email:{email}" for email in emails if email]
+        if user_id is not None:
+            keys.append(f"id:{user_id}")
+        try:
+            self.backend.delete(*keys)
+            self.invalidations += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ User cache invalidation failed: {e}")
+
+    def clear(self) -> None:
+        if self.enabled:
+            self.backend.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters used to size the cache"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.enabled else None,
+            "ttl": getattr(self.backend, "ttl", None),
+            "maxsize": getattr(self.backend, "maxsize", None),
+            "size": len(self.backend) if self.enabled else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+def create_user_cache(backend_name: str = USER_CACHE_BACKEND) -> UserCache:
+    """
+    Build the user cache from configuration
+    """
+    if backend_name == "none":
+        return UserCache(None)
+
+    if backend_name == "redis":
+        try:
+            import redis
+            client = redis.Redis.from_url(REDIS_URL)
+            return UserCache(RedisCache(client, ttl=USER_CACHE_TTL))
+        except ImportError:
+            logger.warning("⚠️ redis package not installed, using in-process LRU user cache")
+
+    return UserCache(LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL))
+
+# Shared cache instance used by db/crud.py
+user_cache = create_user_cache()
+
+class UserCounts:
+    """
+    Total / active user counts, maintained incrementally by the crud write
+    functions (per process: db/health.py resynchronizes them periodically
+    to catch the writes of other workers)
+
+    A resynchronization is not atomic with the writes: a write may commit
+    before the aggregate query and apply() after seed(), or the reverse.
+    The writes therefore run inside writing() (commit, then apply), and
+    seed() only keeps a query result when no write was in flight when the
+    query started (snapshot()) and none has ended since.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+        self._active: Optional[int] = None
+        self._writes_in_flight = 0
+        self._generation = 0
+        self.refreshed_at: Optional[float] = None
+
+    def get(self) -> Optional[Dict[str, int]]:
+        """Current counts, None until seeded (or after invalidate)"""
+        with self._lock:
+            if self._total is None:
+                return None
+            return self._counts(self._total, self._active)
+
+    @staticmethod
+    def _counts(total: int, active: int) -> Dict[str, int]:
+        return {"total_users": total, "active_users": active, "inactive_users": total - active}
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """Wrap a write from before its commit to its apply() / invalidate()"""
+        with self._lock:
+            self._writes_in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._writes_in_flight -= 1
+                self._generation += 1
+
+    def snapshot(self) -> Optional[int]:
+        """Token taken before the query of seed() (None: a write is in flight)"""
+        with self._lock:
+            return self._generation if not self._writes_in_flight else None
+
+    def seed(self, total: int, active: int, token: Optional[int] = None) -> Dict[str, int]:
+        """
+        Reset the counts from a database query started at `token` (snapshot()).
+        The result is returned, but not kept when a write overlapped the query.
+        """
+        with self._lock:
+            if token is not None and token == self._generation and not self._writes_in_flight:
+                self._total, self._active = total, active
+                self.refreshed_at = time.monotonic()
+        return self._counts(total, active)
+
+    def apply(self, total: int = 0, active: int = 0) -> None:
+        """Add a committed change (no-op until seeded)"""
+        with self._lock:
+            if self._total is not None:
+                self._total += total
+                self._active += active
+
+    def invalidate(self) -> None:
+        """Forget the counts (changes whose effect is unknown, e.g. bulk updates)"""
+        with self._lock:
+            self._total = self._active = None
+            self._generation += 1
+
+# Shared counts used by db/crud.py and db/health.py
+user_counts = UserCounts()
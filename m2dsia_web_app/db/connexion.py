@@ -1,11 +1,19 @@
 # db/connexion.py - VERSION AWS RDS
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
+import asyncio
+import json
 import os
 import socket
+import tempfile
+import threading
 import time
 import logging
 
+from db.engine import build_engine, build_async_engine
+from db.routing import RoutingSession, create_replica_set, DB_REPLICA_CHECK_INTERVAL
+
 # Configuration de base
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,10 +30,82 @@ AWS_RDS_CONFIG = {
 # Configuration SQLite locale (fallback)
 LOCAL_DATABASE_URL = "sqlite:///./m2dsia_local.db"
 
-def test_host_connectivity(host, port=3306, timeout=5):
+# Explicit database URL (bypasses the AWS RDS / SQLite selection when set)
+ENV_DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Couche asynchrone (AsyncSession) pour les endpoints FastAPI
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "false").lower() == "true"
+
+# Async driver for each sync dialect
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+}
+
+# AWS RDS reachability probe (DNS + TCP) timeout, in seconds
+DB_PROBE_TIMEOUT = float(os.getenv("DB_PROBE_TIMEOUT", "5"))
+
+# Cached RDS -> SQLite fallback decision, shared by the workers and scripts
+# started within DB_FALLBACK_CACHE_TTL seconds. Off by default (0): a cached
+# decision pins every new worker to the local SQLite file, whose writes never
+# reach RDS, even once RDS is reachable again
+DB_FALLBACK_CACHE_FILE = os.getenv(
+    "DB_FALLBACK_CACHE_FILE", os.path.join(tempfile.gettempdir(), "m2dsia_db_fallback.json")
+)
+DB_FALLBACK_CACHE_TTL = float(os.getenv("DB_FALLBACK_CACHE_TTL", "0"))
+
+def use_aws_rds():
+    """AWS RDS is tried first unless USE_AWS_RDS=false"""
+    return os.getenv("USE_AWS_RDS", "true").lower() == "true"
+
+def load_fallback_decision():
+    """Return the cached fallback decision if it is still valid, else None"""
+    if DB_FALLBACK_CACHE_TTL <= 0:
+        return None
+    try:
+        with open(DB_FALLBACK_CACHE_FILE) as f:
+            decision = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if decision.get("host") != AWS_RDS_CONFIG["host"]:
+        return None
+    if time.time() - decision.get("decided_at", 0) > DB_FALLBACK_CACHE_TTL:
+        return None
+    return decision
+
+def remember_fallback_decision(reason):
+    """Cache the decision to skip AWS RDS for the next DB_FALLBACK_CACHE_TTL seconds"""
+    if DB_FALLBACK_CACHE_TTL <= 0:
+        return
+    decision = {"host": AWS_RDS_CONFIG["host"], "backend": "sqlite", "reason": reason, "decided_at": time.time()}
+    try:
+        with open(DB_FALLBACK_CACHE_FILE, "w") as f:
+            json.dump(decision, f)
+    except OSError as e:
+        logger.warning(f"⚠️ Cannot cache database fallback decision: {e}")
+
+def clear_fallback_decision():
+    """Forget the cached fallback decision"""
+    try:
+        os.remove(DB_FALLBACK_CACHE_FILE)
+    except OSError:
+        pass
+
+async def probe_host_async(host, port=3306, timeout=DB_PROBE_TIMEOUT):
+    """Non-blocking DNS + TCP reachability test, for the event loop"""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        writer.close()
+        logger.info(f"✅ Host {host}:{port} is reachable")
+        return True
+    except (OSError, asyncio.TimeoutError) as e:
+        logger.error(f"❌ Cannot reach {host}:{port} - {e!r}")
+        return False
+
+def test_host_connectivity(host, port=3306, timeout=DB_PROBE_TIMEOUT):
     """Test if we can connect to the host"""
     try:
-        socket.create_connection((host, port), timeout)
+        socket.create_connection((host, port), timeout).close()
         logger.info(f"✅ Host {host}:{port} is reachable")
         return True
     except socket.error as e:
@@ -42,40 +122,28 @@ def test_dns_resolution(host):
         logger.error(f"❌ DNS resolution failed for {host} - {e}")
         return False
 
-def create_aws_engine():
-    """Create AWS RDS MySQL engine"""
+def aws_database_url():
+    """SQLAlchemy URL of the AWS RDS MySQL database"""
+    return (
+        f"mysql+pymysql://{AWS_RDS_CONFIG['user']}:{AWS_RDS_CONFIG['password']}"
+        f"@{AWS_RDS_CONFIG['host']}:{AWS_RDS_CONFIG['port']}/{AWS_RDS_CONFIG['database']}"
+    )
+
+def create_aws_engine(probe=True):
+    """Create AWS RDS MySQL engine (probe=False when reachability is already known)"""
     try:
         # Test DNS resolution first
-        if not test_dns_resolution(AWS_RDS_CONFIG["host"]):
+        if probe and not test_dns_resolution(AWS_RDS_CONFIG["host"]):
             logger.error("DNS resolution failed, cannot connect to AWS RDS")
             return None
         
         # Test connectivity
-        if not test_host_connectivity(AWS_RDS_CONFIG["host"], AWS_RDS_CONFIG["port"]):
+        if probe and not test_host_connectivity(AWS_RDS_CONFIG["host"], AWS_RDS_CONFIG["port"]):
             logger.error("Host connectivity failed, cannot connect to AWS RDS")
             return None
         
-        # Create connection URL
-        DATABASE_URL = (
-            f"mysql+pymysql://{AWS_RDS_CONFIG['user']}:{AWS_RDS_CONFIG['password']}"
-            f"@{AWS_RDS_CONFIG['host']}:{AWS_RDS_CONFIG['port']}/{AWS_RDS_CONFIG['database']}"
-        )
-        
-        # Create engine with connection pooling and error handling
-        engine = create_engine(
-            DATABASE_URL,
-            echo=True,
-            pool_size=10,
-            max_overflow=20,
-            pool_pre_ping=True,
-            pool_recycle=3600,
-            connect_args={
-                "connect_timeout": 30,
-                "read_timeout": 30,
-                "write_timeout": 30,
-                "charset": "utf8mb4"
-            }
-        )
+        # Create engine with connection pooling (settings from db/engine.py)
+        engine = build_engine(aws_database_url())
         
         # Test the connection
         with engine.connect() as conn:
@@ -91,11 +159,8 @@ def create_aws_engine():
 def create_local_engine():
     """Create local SQLite engine as fallback"""
     try:
-        engine = create_engine(
-            LOCAL_DATABASE_URL,
-            echo=True,
-            connect_args={"check_same_thread": False}
-        )
+        # WAL journal and pragmas are configured in db/engine.py
+        engine = build_engine(LOCAL_DATABASE_URL)
         
         # Test the connection
         with engine.connect() as conn:
@@ -108,38 +173,178 @@ def create_local_engine():
         logger.error(f"❌ Failed to create local SQLite engine: {e}")
         return None
 
-def get_engine():
-    """Get database engine with fallback logic"""
+def create_engine_with_fallback(rds_reachable=None):
+    """
+    Create the database engine with fallback logic
     
-    # Try to use environment variable first
-    use_aws = os.getenv("USE_AWS_RDS", "true").lower() == "true"
+    rds_reachable: result of an earlier probe (probe_host_async), None to probe here
+    """
     
-    if use_aws:
-        logger.info("🔄 Attempting to connect to AWS RDS...")
-        engine = create_aws_engine()
-        
-        if engine:
-            logger.info("🎉 Using AWS RDS MySQL database")
-            return engine
+    # Explicit URL wins (tests, benchmarks, other deployments)
+    if ENV_DATABASE_URL:
+        logger.info("🔄 Using DATABASE_URL")
+        return build_engine(ENV_DATABASE_URL)
+    
+    # Try to use environment variable first
+    if use_aws_rds():
+        decision = load_fallback_decision() if rds_reachable is None else None
+        if decision:
+            age = time.time() - decision["decided_at"]
+            logger.warning(
+                f"⚠️ Skipping AWS RDS, cached decision from {age:.0f}s ago ({decision['reason']}): "
+                f"writes go to the local SQLite database, not to RDS (DB_FALLBACK_CACHE_TTL={DB_FALLBACK_CACHE_TTL:.0f})"
+            )
         else:
-            logger.warning("⚠️ AWS RDS connection failed, falling back to local SQLite")
+            engine = None
+            if rds_reachable is not False:
+                logger.info("🔄 Attempting to connect to AWS RDS...")
+                engine = create_aws_engine(probe=rds_reachable is None)
+            
+            if engine:
+                logger.info("🎉 Using AWS RDS MySQL database")
+                return engine
+            else:
+                if rds_reachable is not False:
+                    # An unreachable host found by init_engine_async is already cached
+                    remember_fallback_decision("AWS RDS connection failed")
+                logger.warning("⚠️ AWS RDS connection failed, falling back to local SQLite")
     
     # Fallback to local SQLite
     logger.info("🔄 Using local SQLite database")
     return create_local_engine()
 
-# Create engine with fallback
-engine = get_engine()
+class LazySessionmaker(sessionmaker):
+    """sessionmaker that creates the engine on the first session"""
+    
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None and "bind" not in local_kw:
+            get_engine()
+        return super().__call__(**local_kw)
+
+class LazyAsyncSessionmaker(async_sessionmaker):
+    """async_sessionmaker that creates the async engine on the first session"""
+    
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None and "bind" not in local_kw:
+            get_async_engine()
+        return super().__call__(**local_kw)
+
+# Engines are created on first use (get_engine / init_engine_async), not at import
+_engine = None
+_async_engine = None
+_engine_lock = threading.Lock()
 
-if engine is None:
-    raise Exception("❌ Failed to create any database engine!")
+# Read replicas (DB_REPLICA_URLS), created with the primary engine
+replica_set = None
+async_replica_set = None
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create session factory (bound when the engine is created)
+SessionLocal = LazySessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 
 # Base class for declarative models
 Base = declarative_base()
 
+def create_async_engine_from(sync_engine):
+    """
+    Create the async engine (aiosqlite / aiomysql) pointing to the same
+    database as the selected sync engine
+    """
+    url = sync_engine.url.set(drivername=ASYNC_DRIVERS[sync_engine.dialect.name])
+    return build_async_engine(url)
+
+# Async session factory (only when USE_ASYNC_DB=true)
+AsyncSessionLocal = (
+    # expire_on_commit=False: attributes stay loaded after commit (no lazy IO in async code)
+    LazyAsyncSessionmaker(sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False)
+    if USE_ASYNC_DB else None
+)
+
+def init_engine(rds_reachable=None):
+    """
+    Create the engine once (thread-safe) and bind the session factories
+    """
+    global _engine, replica_set
+    with _engine_lock:
+        if _engine is None:
+            engine = create_engine_with_fallback(rds_reachable)
+            if engine is None:
+                raise Exception("❌ Failed to create any database engine!")
+            replica_set = create_replica_set(build_engine)
+            if replica_set:
+                # Reads go to the replicas, writes to the primary (db/routing.py)
+                SessionLocal.configure(replicas=replica_set)
+            _engine = engine
+            SessionLocal.configure(bind=engine)
+    return _engine
+
+def get_engine():
+    """Get database engine, created with fallback logic on first call"""
+    return _engine if _engine is not None else init_engine()
+
+def get_async_engine():
+    """Get the async engine (None unless USE_ASYNC_DB=true), created on first call"""
+    global _async_engine, async_replica_set
+    if not USE_ASYNC_DB:
+        return None
+    if _async_engine is None:
+        engine = get_engine()
+        with _engine_lock:
+            if _async_engine is None:
+                if replica_set:
+                    async_replica_set = replica_set.derive(create_async_engine_from)
+                    AsyncSessionLocal.configure(replicas=async_replica_set)
+                _async_engine = create_async_engine_from(engine)
+                AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+async def init_engine_async():
+    """
+    Create the engines from the FastAPI lifespan without blocking the event loop:
+    AWS RDS is probed with asyncio, the engine is built in a worker thread
+    """
+    if _engine is not None:
+        return _engine
+    
+    rds_reachable = None
+    if not ENV_DATABASE_URL and use_aws_rds() and load_fallback_decision() is None:
+        logger.info("🔄 Probing AWS RDS...")
+        rds_reachable = await probe_host_async(AWS_RDS_CONFIG["host"], AWS_RDS_CONFIG["port"])
+        if not rds_reachable:
+            remember_fallback_decision("AWS RDS unreachable")
+    
+    engine = await asyncio.to_thread(init_engine, rds_reachable)
+    if USE_ASYNC_DB:
+        await asyncio.to_thread(get_async_engine)
+    return engine
+
+async def monitor_replicas(interval=DB_REPLICA_CHECK_INTERVAL):
+    """Periodic replica health check (ejection / return to rotation), run from the lifespan"""
+    while True:
+        await asyncio.sleep(interval)
+        for replicas in (replica_set, async_replica_set):
+            if replicas:
+                await replicas.check_health()
+
+async def dispose_engines():
+    """Close the pooled connections (application shutdown)"""
+    if async_replica_set:
+        for replica in async_replica_set.replicas:
+            await replica.engine.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if replica_set:
+        replica_set.dispose()
+    if _engine is not None:
+        _engine.dispose()
+
+def __getattr__(name):
+    # Lazy module attributes: `connexion.engine` creates the engine on first access
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Dependency to get database session
 def get_db():
     """
@@ -152,15 +357,28 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """
+    Dependency function to get an AsyncSession (requires USE_ASYNC_DB=true)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Session dependency used by the API, selected by configuration
+get_session = get_async_db if USE_ASYNC_DB else get_db
+
 # Test connection function
 def test_connection():
     """
     Test database connection
     """
     try:
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             result = connection.execute(text("SELECT 1"))
-            db_name = connection.execute(text("SELECT DATABASE()")).fetchone()
+            # DATABASE() is MySQL-only
+            db_name = None
+            if connection.dialect.name == "mysql":
+                db_name = connection.execute(text("SELECT DATABASE()")).fetchone()
             if db_name and db_name[0]:
                 logger.info(f"✅ Database connection successful! Connected to: {db_name[0]}")
             else:
@@ -174,6 +392,7 @@ def test_connection():
 def get_current_database_info():
     """Get current database information"""
     try:
+        engine = get_engine()
         with engine.connect() as connection:
             if "sqlite" in str(engine.url):
                 return {
@@ -197,13 +416,19 @@ def get_current_database_info():
 
 def force_aws_connection():
     """Force reconnection to AWS RDS"""
-    global engine, SessionLocal
+    global _engine, _async_engine
     
     logger.info("🔄 Forcing AWS RDS connection...")
     engine = create_aws_engine()
     
     if engine:
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        clear_fallback_decision()
+        with _engine_lock:
+            _engine = engine
+            SessionLocal.configure(bind=engine)
+            if USE_ASYNC_DB:
+                _async_engine = create_async_engine_from(engine)
+                AsyncSessionLocal.configure(bind=_async_engine)
         Base.metadata.bind = engine
         logger.info("✅ Forced AWS RDS connection successful!")
         return True
@@ -221,5 +446,5 @@ if __name__ == "__main__":
         print(f"📊 Database Info: {info}")
     
     # Show connection details
-    print(f"\n🔧 Engine URL: {engine.url}")
-    print(f"🔧 Engine Type: {type(engine).__name__}")
\ No newline at end of file
+    print(f"\n🔧 Engine URL: {get_engine().url}")
+    print(f"🔧 Engine Type: {type(get_engine()).__name__}")
\ No newline at end of file
@@ -1,9 +1,44 @@
 # db/crud.py
-from sqlalchemy.orm import Session
+import base64
+import json
+import re
+from datetime import datetime
+from sqlalchemy import delete, insert, or_, select, update, table, column, func, Integer
+from sqlalchemy.dialects.mysql import insert as mysql_insert, match as mysql_match
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, make_transient_to_detached
 from sqlalchemy.exc import IntegrityError
-from models.models import User as UserModel
+from models.models import User as UserModel, USERS_FTS_TABLE, has_search_index
 from schemas.schemas import UserCreate, UserUpdate
-from typing import List, Optional
+from db.cache import user_cache, user_counts
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Lightweight handle on the SQLite FTS5 shadow table (see models.SQLITE_FTS_DDL)
+users_fts = table(USERS_FTS_TABLE, column("rowid", Integer), column(USERS_FTS_TABLE))
+
+# Minimum term length understood by the trigram tokenizer / InnoDB FULLTEXT
+MIN_FULLTEXT_TERM_LENGTH = 3
+
+# Cache of the full-text index availability, per database URL
+_search_index_cache = {}
+
+# Columns exposed by UserResponse, in export order (export, list endpoints projections)
+EXPORT_COLUMNS = ("id", "email", "nom", "prenom", "classe", "is_active")
+
+# Shapes of the users returned by the list / search functions
+PROJECTION_FULL = "full"  # User entities, every column
+PROJECTION_ROWS = "rows"  # EXPORT_COLUMNS only, as plain Row tuples: no ORM instances, no identity map
+PROJECTIONS = (PROJECTION_FULL, PROJECTION_ROWS)
+
+def _users_query(db: Session, projection: str = PROJECTION_FULL):
+    """
+    Query on users with the given projection (raises ValueError if unknown)
+    """
+    if projection == PROJECTION_FULL:
+        return db.query(UserModel)
+    if projection == PROJECTION_ROWS:
+        return db.query(*(getattr(UserModel, name) for name in EXPORT_COLUMNS))
+    raise ValueError(f"Unknown projection: {projection}")
 
 def create_user(db: Session, user: UserCreate) -> UserModel:
     """
@@ -12,8 +47,10 @@ def create_user(db: Session, user: UserCreate) -> UserModel:
     try:
         db_user = UserModel(**user.dict())
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        with user_counts.writing():
+            db.commit()
+            db.refresh(db_user)
+            user_counts.apply(total=1, active=int(db_user.is_active))
         return db_user
     except IntegrityError as e:
         db.rollback()
@@ -22,23 +59,62 @@ def create_user(db: Session, user: UserCreate) -> UserModel:
         db.rollback()
         raise e
 
+def _user_to_cache(db_user: UserModel) -> Dict[str, Any]:
+    """
+    Column values of a user, as stored in the cache
+    """
+    return {column.key: getattr(db_user, column.key) for column in UserModel.__table__.columns}
+
+def _user_from_cache(db: Session, data: Dict[str, Any]) -> UserModel:
+    """
+    Attach a cached user to the session without querying the database
+    """
+    db_user = UserModel(**data)
+    make_transient_to_detached(db_user)
+    return db.merge(db_user, load=False)
+
 def get_user_by_id(db: Session, user_id: int) -> Optional[UserModel]:
     """
-    Get a user by ID
+    Get a user by ID (read-through cache)
     """
-    return db.query(UserModel).filter(UserModel.id == user_id).first()
+    cached = user_cache.get_by_id(user_id)
+    if cached is not None:
+        return _user_from_cache(db, cached)
+    
+    # Filled from the primary: a lagging replica would put a stale user in the shared cache
+    db_user = db.query(UserModel).filter(UserModel.id == user_id).execution_options(use_primary=user_cache.enabled).first()
+    if db_user:
+        user_cache.store(_user_to_cache(db_user))
+    return db_user
 
 def get_user_by_email(db: Session, email: str) -> Optional[UserModel]:
     """
-    Get a user by email
+    Get a user by email (read-through cache)
     """
-    return db.query(UserModel).filter(UserModel.email == email).first()
+    cached = user_cache.get_by_email(email)
+    if cached is not None:
+        return _user_from_cache(db, cached)
+    
+    # Filled from the primary: a lagging replica would put a stale user in the shared cache
+    db_user = db.query(UserModel).filter(UserModel.email == email).execution_options(use_primary=user_cache.enabled).first()
+    if db_user:
+        user_cache.store(_user_to_cache(db_user))
+    return db_user
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[UserModel]:
+def get_users(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    projection: str = PROJECTION_FULL
+) -> List[UserModel]:
     """
-    Get all users with pagination
+    Get all users with pagination (keyset on id when after_id is given)
     """
-    return db.query(UserModel).offset(skip).limit(limit).all()
+    query = _users_query(db, projection)
+    if after_id is not None:
+        query = query.filter(UserModel.id > after_id)
+    return query.order_by(UserModel.id).offset(skip).limit(limit).all()
 
 def get_all_users(db: Session) -> List[UserModel]:
     """
@@ -55,11 +131,16 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[
         if not db_user:
             return None
         
+        old_email = db_user.email
+        was_active = db_user.is_active
         update_data = user_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_user, field, value)
         
-        db.commit()
+        with user_counts.writing():
+            db.commit()
+            user_counts.apply(active=int(bool(update_data.get("is_active", was_active))) - int(bool(was_active)))
+        user_cache.invalidate(user_id, old_email, update_data.get("email"))
         db.refresh(db_user)
         return db_user
     except Exception as e:
@@ -75,24 +156,46 @@ def delete_user(db: Session, user_id: int) -> bool:
         if not db_user:
             return False
         
+        email = db_user.email
+        was_active = db_user.is_active
         db.delete(db_user)
-        db.commit()
+        with user_counts.writing():
+            db.commit()
+            user_counts.apply(total=-1, active=-int(bool(was_active)))
+        user_cache.invalidate(user_id, email)
         return True
     except Exception as e:
         db.rollback()
         raise e
 
-def get_users_by_class(db: Session, classe: str) -> List[UserModel]:
+def get_users_by_class(
+    db: Session,
+    classe: str,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    projection: str = PROJECTION_FULL
+) -> List[UserModel]:
     """
-    Get users by class
+    Get users by class (keyset on id when after_id / limit are given)
     """
-    return db.query(UserModel).filter(UserModel.classe == classe).all()
+    query = _users_query(db, projection).filter(UserModel.classe == classe)
+    if after_id is not None:
+        query = query.filter(UserModel.id > after_id)
+    return query.order_by(UserModel.id).limit(limit).all()
 
-def get_active_users(db: Session) -> List[UserModel]:
+def get_active_users(
+    db: Session,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    projection: str = PROJECTION_FULL
+) -> List[UserModel]:
     """
-    Get only active users
+    Get only active users (keyset on id when after_id / limit are given)
     """
-    return db.query(UserModel).filter(UserModel.is_active == True).all()
+    query = _users_query(db, projection).filter(UserModel.is_active == True)
+    if after_id is not None:
+        query = query.filter(UserModel.id > after_id)
+    return query.order_by(UserModel.id).limit(limit).all()
 
 def deactivate_user(db: Session, user_id: int) -> Optional[UserModel]:
     """
@@ -103,10 +206,432 @@ def deactivate_user(db: Session, user_id: int) -> Optional[UserModel]:
         if not db_user:
             return None
         
+        email = db_user.email
+        was_active = db_user.is_active
         db_user.is_active = False
-        db.commit()
+        with user_counts.writing():
+            db.commit()
+            user_counts.apply(active=-int(bool(was_active)))
+        user_cache.invalidate(user_id, email)
         db.refresh(db_user)
         return db_user
     except Exception as e:
         db.rollback()
-        raise e
\ No newline at end of file
+        raise e
+
+def _search_index_available(db: Session) -> bool:
+    """
+    Check once per database whether the full-text index can be used
+    """
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _search_index_cache:
+        _search_index_cache[key] = has_search_index(bind)
+    return _search_index_cache[key]
+
+def _like_search_clause(q: str):
+    """
+    Case-insensitive substring match on nom, prenom and email (no index)
+    """
+    return or_(
+        UserModel.nom.icontains(q, autoescape=True),
+        UserModel.prenom.icontains(q, autoescape=True),
+        UserModel.email.icontains(q, autoescape=True)
+    )
+
+def _fulltext_terms(q: str) -> List[str]:
+    """
+    Split a query into FULLTEXT words, or return [] if a term is too short to be indexed
+    """
+    terms = re.findall(r"\w+", q)
+    if not terms or any(len(term) < MIN_FULLTEXT_TERM_LENGTH for term in terms):
+        return []
+    return terms
+
+def search_users(
+    db: Session,
+    q: Optional[str] = None,
+    classe: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    after_id: Optional[int] = None,
+    limit: int = 100,
+    projection: str = PROJECTION_FULL
+) -> List[UserModel]:
+    """
+    Search users with all filters composed into a single SQL statement.
+
+    The text query uses the FTS5 shadow table on SQLite and the FULLTEXT
+    index on MySQL, and falls back to LIKE for short terms. Results are
+    ordered by id: pass the last id of a page as after_id to get the next one.
+    """
+    query = _users_query(db, projection)
+    # Same order as users.id; on the FTS table it spares SQLite a sort of the matches
+    order_key = UserModel.id
+    
+    q = q.strip() if q else None
+    if q:
+        dialect = db.get_bind().dialect.name
+        use_index = _search_index_available(db)
+        if use_index and dialect == "sqlite" and len(q) >= MIN_FULLTEXT_TERM_LENGTH:
+            # Quoted FTS5 string: trigram substring match, case-insensitive
+            phrase = '"' + q.replace('"', '""') + '"'
+            query = query.join(users_fts, users_fts.c.rowid == UserModel.id).filter(
+                users_fts.c[USERS_FTS_TABLE].match(phrase)
+            )
+            order_key = users_fts.c.rowid
+        elif use_index and dialect == "mysql" and _fulltext_terms(q):
+            # Boolean mode: every word required, matched as a prefix
+            against = " ".join(f"+{term}*" for term in _fulltext_terms(q))
+            query = query.filter(
+                mysql_match(UserModel.nom, UserModel.prenom, UserModel.email, against=against)
+                .in_boolean_mode()
+            )
+        else:
+            query = query.filter(_like_search_clause(q))
+    
+    if classe:
+        query = query.filter(UserModel.classe == classe)
+    
+    if is_active is not None:
+        query = query.filter(UserModel.is_active == is_active)
+    
+    if after_id is not None:
+        query = query.filter(order_key > after_id)
+    
+    return query.order_by(order_key).limit(limit).all()
+
+def get_user_stats(db: Session) -> Dict[str, Any]:
+    """
+    Get user totals and per-class breakdown from a single GROUP BY query
+    """
+    rows = (
+        db.query(UserModel.classe, UserModel.is_active, func.count(UserModel.id))
+        .group_by(UserModel.classe, UserModel.is_active)
+        .all()
+    )
+    
+    total_users = 0
+    active_users = 0
+    classes = {}
+    for classe, is_active, count in rows:
+        stats = classes.setdefault(classe, {"total": 0, "active": 0})
+        stats["total"] += count
+        total_users += count
+        if is_active:
+            stats["active"] += count
+            active_users += count
+    
+    return {
+        "total_users": total_users,
+        "active_users": active_users,
+        "inactive_users": total_users - active_users,
+        "classes": classes
+    }
+
+def get_user_counts(db: Session) -> Dict[str, int]:
+    """
+    Total / active / inactive users from the incremental counts cache
+    (one aggregate query when the counts are unknown)
+    """
+    counts = user_counts.get()
+    if counts is None:
+        token = user_counts.snapshot()
+        stats = get_user_stats(db)
+        counts = user_counts.seed(stats["total_users"], stats["active_users"], token)
+    return counts
+
+# === PAGINATION PAR CURSEUR ===
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """
+    Encode a keyset position as an opaque, URL-safe cursor
+    """
+    payload = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor (raises ValueError if invalid)
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(values, dict) or not isinstance(values.get("id"), int):
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+def cursor_after_id(cursor: Optional[str], scope: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """
+    Decode a cursor into the last id already returned, checking its scope.
+    `scope` holds the fixed part of the key (e.g. {"classe": ...}); it is
+    embedded in the cursor so it cannot be replayed against another scope.
+    """
+    if not cursor:
+        return None
+    values = decode_cursor(cursor)
+    if any(values.get(key) != value for key, value in (scope or {}).items()):
+        raise ValueError("Pagination cursor does not match this query")
+    return values["id"]
+
+def page_with_cursor(
+    users: List[UserModel], limit: int, scope: Optional[Dict[str, Any]] = None
+) -> Tuple[List[UserModel], Optional[str]]:
+    """
+    Trim a `limit + 1` fetch to one page and build the next cursor
+    """
+    # One extra row tells us whether there is a next page
+    if len(users) <= limit:
+        return users, None
+    
+    users = users[:limit]
+    return users, encode_cursor({**(scope or {}), "id": users[-1].id})
+
+def paginate(
+    fetch: Callable[..., List[UserModel]],
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    scope: Optional[Dict[str, Any]] = None
+) -> Tuple[List[UserModel], Optional[str]]:
+    """
+    Fetch one keyset page and the cursor of the next one.
+
+    `fetch(after_id=..., limit=...)` must return users ordered by id.
+    """
+    after_id = cursor_after_id(cursor, scope)
+    users = fetch(after_id=after_id, limit=limit + 1)
+    return page_with_cursor(users, limit, scope)
+
+# === VERSION DES COLLECTIONS ===
+
+def get_users_version(
+    db: Session, classe: Optional[str] = None, is_active: Optional[bool] = None
+) -> Tuple[int, Optional[datetime], Optional[datetime]]:
+    """
+    Version of a users collection: (count, max(updated_at), database time).
+
+    One aggregate query, no row loaded: any insert or update moves
+    max(updated_at), any delete (or row leaving the filter) changes count.
+    """
+    stmt = select(func.count(UserModel.id), func.max(UserModel.updated_at), func.now())
+    if classe:
+        stmt = stmt.where(UserModel.classe == classe)
+    if is_active is not None:
+        stmt = stmt.where(UserModel.is_active == is_active)
+    count, last_modified, now = db.execute(stmt).one()
+    return count, last_modified, now
+
+# === EXPORT EN FLUX ===
+
+def export_statement(classe: Optional[str] = None, is_active: Optional[bool] = None, batch_size: int = 1000):
+    """
+    Build the SELECT of EXPORT_COLUMNS used by stream_users (sync and async)
+    """
+    stmt = select(*(getattr(UserModel, name) for name in EXPORT_COLUMNS))
+    if classe:
+        stmt = stmt.where(UserModel.classe == classe)
+    if is_active is not None:
+        stmt = stmt.where(UserModel.is_active == is_active)
+    return stmt.order_by(UserModel.id).execution_options(yield_per=batch_size)
+
+def stream_users(
+    db: Session,
+    classe: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    batch_size: int = 1000
+) -> Iterator[Sequence[Tuple]]:
+    """
+    Stream users as batches of plain tuples (EXPORT_COLUMNS order).
+
+    Uses yield_per, i.e. a server-side cursor on MySQL, so only one batch
+    is held in memory at a time whatever the table size.
+    """
+    result = db.execute(export_statement(classe, is_active, batch_size))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+# === IMPORT EN MASSE ===
+
+# Columns refreshed by an upsert (bulk import with on_conflict="update"), along with updated_at
+BULK_UPDATE_FIELDS = ("nom", "prenom", "classe")
+
+def _bulk_insert_statement(dialect: str, rows: List[Dict[str, Any]], update: bool):
+    """
+    Multi-row INSERT that skips (or updates) rows whose email already exists
+    """
+    if dialect == "mysql":
+        stmt = mysql_insert(UserModel).values(rows)
+        if update:
+            return stmt.on_duplicate_key_update(
+                **{field: stmt.inserted[field] for field in BULK_UPDATE_FIELDS}, updated_at=func.now()
+            )
+        # No-op assignment: the duplicate row is left untouched
+        return stmt.on_duplicate_key_update(id=UserModel.id)
+    
+    if dialect == "sqlite":
+        stmt = sqlite_insert(UserModel).values(rows)
+        if update:
+            return stmt.on_conflict_do_update(
+                index_elements=[UserModel.email],
+                set_={**{field: stmt.excluded[field] for field in BULK_UPDATE_FIELDS}, "updated_at": func.now()}
+            )
+        return stmt.on_conflict_do_nothing(index_elements=[UserModel.email])
+    
+    return insert(UserModel).values(rows)
+
+def bulk_create_users(
+    db: Session,
+    users: Sequence[UserCreate],
+    batch_size: int = 500,
+    on_conflict: str = "skip"
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Insert users in batches of multi-row INSERT statements.
+
+    `users` must have unique emails. Existing emails are skipped
+    (on_conflict="skip") or get nom/prenom/classe updated ("update").
+    Each batch is its own transaction: a failing batch is rolled back and
+    reported without losing the others.
+    Returns {email: {"status": created|updated|exists|error, "id": ..., "error": ...}}.
+    """
+    dialect = db.get_bind().dialect.name
+    update = on_conflict == "update"
+    results = {}
+    
+    for start in range(0, len(users), batch_size):
+        batch = users[start:start + batch_size]
+        emails = [user.email for user in batch]
+        try:
+            # On the primary: an email missing from a lagging replica would be reported as created
+            existing = dict(
+                db.query(UserModel.email, UserModel.id).filter(UserModel.email.in_(emails))
+                .execution_options(use_primary=True).all()
+            )
+            rows = [
+                {**user.dict(), "is_active": True}
+                for user in batch
+                if update or user.email not in existing
+            ]
+            if rows:
+                db.execute(_bulk_insert_statement(dialect, rows, update))
+            
+            new_emails = [email for email in emails if email not in existing]
+            inserted = dict(
+                db.query(UserModel.email, UserModel.id).filter(UserModel.email.in_(new_emails)).all()
+            ) if new_emails else {}
+            with user_counts.writing():
+                db.commit()
+                user_counts.apply(total=len(inserted), active=len(inserted))
+        except Exception as e:
+            db.rollback()
+            for email in emails:
+                results[email] = {"status": "error", "id": None, "error": str(e)}
+            continue
+        
+        for email in emails:
+            if email in existing:
+                if update:
+                    user_cache.invalidate(existing[email], email)
+                results[email] = {"status": "updated" if update else "exists", "id": existing[email]}
+            elif email in inserted:
+                results[email] = {"status": "created", "id": inserted[email]}
+            else:
+                results[email] = {"status": "exists", "id": None}
+    
+    return results
+
+# === MISE À JOUR / SUPPRESSION EN MASSE ===
+
+def _bulk_where(ids: Optional[List[int]] = None, classe: Optional[str] = None, is_active: Optional[bool] = None):
+    """
+    WHERE criteria of a bulk operation; refuses to target the whole table
+    """
+    criteria = []
+    if ids is not None:
+        criteria.append(UserModel.id.in_(ids))
+    if classe:
+        criteria.append(UserModel.classe == classe)
+    if is_active is not None:
+        criteria.append(UserModel.is_active == is_active)
+    if not criteria:
+        raise ValueError("A bulk operation needs at least one filter (ids, classe or is_active)")
+    return criteria
+
+def _run_bulk_statement(db: Session, stmt, returning: bool) -> Tuple[int, Optional[List[Any]]]:
+    """
+    Execute a bulk UPDATE / DELETE and invalidate the cached users it touched.
+    Changed rows are returned through RETURNING when the backend supports it.
+    """
+    supports_returning = (
+        db.get_bind().dialect.update_returning if stmt.is_update
+        else db.get_bind().dialect.delete_returning
+    )
+    try:
+        if supports_returning:
+            columns = [getattr(UserModel, name) for name in EXPORT_COLUMNS] if returning else [UserModel.id, UserModel.email]
+            rows = db.execute(stmt.returning(*columns)).all()
+            affected = len(rows)
+        else:
+            rows = None
+            affected = db.execute(stmt).rowcount
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    if rows is not None:
+        for row in rows:
+            user_cache.invalidate(row.id, row.email)
+    else:
+        # Touched ids are unknown without RETURNING
+        user_cache.clear()
+    user_counts.invalidate()
+    
+    return affected, (rows if returning else None)
+
+def bulk_update_users(
+    db: Session,
+    values: Dict[str, Any],
+    ids: Optional[List[int]] = None,
+    classe: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    returning: bool = False
+) -> Tuple[int, Optional[List[Any]]]:
+    """
+    Update every matching user with one UPDATE ... WHERE statement.
+    Returns (affected count, changed rows if `returning` and supported).
+    """
+    if not values:
+        raise ValueError("No values to update")
+    stmt = update(UserModel.__table__).where(*_bulk_where(ids, classe, is_active)).values(**values)
+    return _run_bulk_statement(db, stmt, returning)
+
+def bulk_deactivate_users(
+    db: Session,
+    ids: Optional[List[int]] = None,
+    classe: Optional[str] = None,
+    returning: bool = False
+) -> Tuple[int, Optional[List[Any]]]:
+    """
+    Deactivate every matching active user in one statement
+    """
+    if ids is None and not classe:
+        raise ValueError("A bulk deactivation needs ids or classe")
+    return bulk_update_users(db, {"is_active": False}, ids=ids, classe=classe, is_active=True, returning=returning)
+
+def bulk_delete_users(
+    db: Session,
+    ids: Optional[List[int]] = None,
+    classe: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    returning: bool = False
+) -> Tuple[int, Optional[List[Any]]]:
+    """
+    Delete every matching user with one DELETE ... WHERE statement
+    """
+    stmt = delete(UserModel.__table__).where(*_bulk_where(ids, classe, is_active))
+    return _run_bulk_statement(db, stmt, returning)
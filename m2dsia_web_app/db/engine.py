@@ -0,0 +1,197 @@
+# db/engine.py
+"""
+Engine factory driven by environment variables.
+
+Pool sizing, statement echo, SQLite pragmas and MySQL connect args are
+read once from the environment (see ENGINE_SETTINGS) and applied to the
+sync and async engines. Pools are instrumented so that /debug/pool can
+report checked-out connections, overflow and checkout wait time.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+# Engine configuration (environment variables, with defaults)
+ENGINE_SETTINGS = {
+    # Statement logging: writes every SQL statement synchronously, keep off under load
+    "echo": _env_bool("DB_ECHO", False),
+    # Pool
+    "pool_size": _env_int("DB_POOL_SIZE", 10),
+    "max_overflow": _env_int("DB_MAX_OVERFLOW", 20),
+    "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+    "pool_recycle": _env_int("DB_POOL_RECYCLE", 3600),
+    "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+    # SQLite pragmas, applied on every new connection
+    "sqlite_pragmas": {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "mmap_size": _env_int("SQLITE_MMAP_SIZE", 268435456),
+        "cache_size": _env_int("SQLITE_CACHE_SIZE", -64000),
+        "busy_timeout": _env_int("SQLITE_BUSY_TIMEOUT", 5000),
+        "foreign_keys": "ON",
+    },
+    # MySQL driver connect args
+    "mysql_connect_args": {
+        "connect_timeout": _env_int("MYSQL_CONNECT_TIMEOUT", 30),
+        "read_timeout": _env_int("MYSQL_READ_TIMEOUT", 30),
+        "write_timeout": _env_int("MYSQL_WRITE_TIMEOUT", 30),
+        "charset": os.getenv("MYSQL_CHARSET", "utf8mb4"),
+    },
+}
+
+class PoolWaitStats:
+    """
+    Checkout wait-time counters shared by the instrumented pools
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "timeouts": self.timeouts,
+        }
+
+class _TimedCheckoutMixin:
+    """Measure how long each checkout waits for a pooled connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self):
+        # Keep the counters when the pool is recreated (dispose / invalidation)
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    """QueuePool recording checkout wait times"""
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool recording checkout wait times"""
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def _engine_kwargs(url, settings: Dict[str, Any], is_async: bool) -> Dict[str, Any]:
+    """Keyword arguments for create_engine / create_async_engine"""
+    kwargs = {"echo": settings["echo"]}
+    backend = url.get_backend_name()
+
+    if backend == "sqlite":
+        if not is_async:
+            kwargs["connect_args"] = {"check_same_thread": False}
+        if _is_memory_sqlite(url):
+            # In-memory databases keep SQLAlchemy's default single-connection pool
+            return kwargs
+    elif backend == "mysql":
+        connect_args = dict(settings["mysql_connect_args"])
+        if is_async:
+            # aiomysql has no read/write timeouts
+            connect_args.pop("read_timeout", None)
+            connect_args.pop("write_timeout", None)
+        kwargs["connect_args"] = connect_args
+
+    kwargs.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=settings["pool_timeout"],
+        pool_recycle=settings["pool_recycle"],
+        pool_pre_ping=settings["pool_pre_ping"],
+    )
+    return kwargs
+
+def _install_sqlite_pragmas(sync_engine, pragmas: Dict[str, Any]) -> None:
+    """Apply PRAGMA statements on every new SQLite connection"""
+
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if value is not None and value != "":
+                cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def build_engine(url, settings: Optional[Dict[str, Any]] = None):
+    """
+    Create a sync engine configured from ENGINE_SETTINGS
+    """
+    settings = settings or ENGINE_SETTINGS
+    url = make_url(url)
+    engine = create_engine(url, **_engine_kwargs(url, settings, is_async=False))
+    if url.get_backend_name() == "sqlite" and not _is_memory_sqlite(url):
+        _install_sqlite_pragmas(engine, settings["sqlite_pragmas"])
+    return engine
+
+def build_async_engine(url, settings: Optional[Dict[str, Any]] = None):
+    """
+    Create an async engine configured from ENGINE_SETTINGS
+    """
+    settings = settings or ENGINE_SETTINGS
+    url = make_url(url)
+    engine = create_async_engine(url, **_engine_kwargs(url, settings, is_async=True))
+    if url.get_backend_name() == "sqlite" and not _is_memory_sqlite(url):
+        _install_sqlite_pragmas(engine.sync_engine, settings["sqlite_pragmas"])
+    return engine
+
+def get_pool_status(engine) -> Dict[str, Any]:
+    """
+    Current pool usage of a sync or async engine
+    """
+    pool = getattr(engine, "sync_engine", engine).pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    else:
+        status["status"] = pool.status()
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status["wait"] = wait_stats.as_dict()
+    return status
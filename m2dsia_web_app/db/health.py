@@ -0,0 +1,142 @@
+# db/health.py
+"""
+Background database health monitor for /health, /health/live, /health/ready and /info.
+
+A task started from the FastAPI lifespan probes the primary pool
+(SELECT 1 on a pooled connection) every HEALTH_CHECK_INTERVAL seconds and
+keeps the result in memory, so a load balancer probe costs no connection
+checkout and no query. The database description comes from the engine URL
+(no SELECT DATABASE()).
+
+The user counts of /info (db.cache.user_counts) are maintained by the crud
+write functions and resynchronized every HEALTH_STATS_REFRESH seconds (a
+resynchronization overlapping a local write is dropped and retried on the
+next probe).
+
+Configuration:
+* HEALTH_CHECK_INTERVAL : seconds between two probes
+* HEALTH_MAX_AGE        : not ready when the last successful probe is older
+* HEALTH_STATS_REFRESH  : seconds between two user counts resynchronizations
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from db import connexion, crud
+from db.cache import user_counts
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "5"))
+HEALTH_MAX_AGE = float(os.getenv("HEALTH_MAX_AGE", str(3 * HEALTH_CHECK_INTERVAL)))
+HEALTH_STATS_REFRESH = float(os.getenv("HEALTH_STATS_REFRESH", "60"))
+
+def describe_database(engine) -> Dict[str, Any]:
+    """Type, host and database of an engine, from its URL"""
+    url = engine.url
+    if url.get_backend_name() == "sqlite":
+        return {"type": "SQLite", "file": url.database}
+    return {"type": "MySQL", "host": url.host, "database": url.database}
+
+def _ping(engine) -> None:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+def _refresh_user_counts() -> None:
+    # Token taken first: the result is dropped if a local write overlaps the query
+    token = user_counts.snapshot()
+    with connexion.SessionLocal() as db:
+        stats = crud.get_user_stats(db)
+    user_counts.seed(stats["total_users"], stats["active_users"], token)
+
+class HealthMonitor:
+    """
+    Last probe result of the primary database, refreshed in the background
+    """
+
+    def __init__(self, interval: float = HEALTH_CHECK_INTERVAL, max_age: float = HEALTH_MAX_AGE,
+                 stats_refresh: float = HEALTH_STATS_REFRESH):
+        self.interval = interval
+        self.max_age = max_age
+        self.stats_refresh = stats_refresh
+        self.connected = False
+        self.latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[datetime] = None
+        self.last_success: Optional[float] = None
+        self.failures = 0
+        self.database: Dict[str, Any] = {}
+
+    async def check(self) -> bool:
+        """Probe the pool once and store the result"""
+        engine = connexion.get_async_engine() or connexion.get_engine()
+        started = time.perf_counter()
+        try:
+            if isinstance(engine, AsyncEngine):
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            else:
+                await asyncio.to_thread(_ping, engine)
+        except Exception as e:
+            if self.connected or self.checked_at is None:
+                logger.error(f"❌ Database health check failed: {e}")
+            self.connected = False
+            self.failures += 1
+            self.last_error = str(e)
+        else:
+            if not self.connected and self.checked_at is not None:
+                logger.info("✅ Database health check recovered")
+            self.connected = True
+            self.failures = 0
+            self.last_error = None
+            self.last_success = time.monotonic()
+        self.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.checked_at = datetime.now()
+        self.database = describe_database(connexion.get_engine())
+        return self.connected
+
+    async def refresh_user_counts(self) -> None:
+        """Resynchronize the user counts when unknown or older than stats_refresh"""
+        refreshed_at = user_counts.refreshed_at
+        if user_counts.get() is not None and refreshed_at is not None \
+                and time.monotonic() - refreshed_at < self.stats_refresh:
+            return
+        try:
+            await asyncio.to_thread(_refresh_user_counts)
+        except Exception as e:
+            logger.warning(f"⚠️ User counts refresh failed: {e}")
+
+    async def run(self) -> None:
+        """Probe loop, run from the lifespan"""
+        while True:
+            await asyncio.sleep(self.interval)
+            if await self.check():
+                await self.refresh_user_counts()
+
+    def ready(self) -> bool:
+        """Last probe succeeded and is recent enough"""
+        return (
+            self.connected and self.last_success is not None
+            and time.monotonic() - self.last_success <= self.max_age
+        )
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "ready": self.ready(),
+            "latency_ms": self.latency_ms,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "consecutive_failures": self.failures,
+            "last_error": self.last_error,
+            **self.database,
+        }
+
+# Shared monitor used by api/main.py
+health_monitor = HealthMonitor()
@@ -0,0 +1,249 @@
+# db/migration.py
+"""
+Resumable, parallel copy of the users table between two databases
+(local SQLite to AWS RDS MySQL by default).
+
+* source rows are read by keyset chunks (id > last id ORDER BY id LIMIT n):
+  memory stays constant whatever the size of the table;
+* each chunk is written in one transaction by one of `workers` writer
+  threads, as one multi-row executemany that skips the emails already
+  present (INSERT IGNORE on MySQL, ON CONFLICT DO NOTHING on SQLite);
+* every column is copied: is_active, created_at, updated_at (and id with keep_ids);
+* the checkpoint file holds the highest source id below which every chunk
+  is committed. A broken run resumes from there: chunks committed past it
+  are replayed and skipped as duplicates. A finished run leaves the
+  checkpoint in place, so the next run only copies the newer users.
+
+Usage:
+    python -m db.migration --workers 4 --chunk-size 1000
+    python -m db.migration --source sqlite:///./m2dsia_local.db --target mysql+pymysql://... --restart
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import sqlite
+
+from db.engine import build_engine
+from models.models import User as UserModel
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MIGRATION_CHUNK_SIZE = int(os.getenv("MIGRATION_CHUNK_SIZE", "1000"))
+MIGRATION_WORKERS = int(os.getenv("MIGRATION_WORKERS", "4"))
+MIGRATION_CHECKPOINT = os.getenv("MIGRATION_CHECKPOINT", ".migration_checkpoint.json")
+
+USERS = UserModel.__table__
+
+def insert_ignore_statement(dialect: str):
+    """
+    Multi-row INSERT that skips the rows conflicting with an existing email (or id)
+    """
+    if dialect == "mysql":
+        return insert(USERS).prefix_with("IGNORE")
+    if dialect == "sqlite":
+        return sqlite.insert(USERS).on_conflict_do_nothing()
+    raise ValueError(f"Unsupported migration target: {dialect}")
+
+def _url_key(engine) -> str:
+    return engine.url.render_as_string(hide_password=True)
+
+class Checkpoint:
+    """
+    Highest source id below which every chunk is committed, saved atomically
+    after each chunk. Chunks may finish out of order (parallel writers):
+    the id only moves past contiguous committed chunks.
+    """
+
+    def __init__(self, path: Optional[str], source: str, target: str):
+        self.path = path
+        self.source = source
+        self.target = target
+        self.last_id = 0
+        self._lock = threading.Lock()
+        self._committed: Dict[int, int] = {}
+        self._next_chunk = 0
+
+    def load(self) -> int:
+        """Resume point of a previous run between the same databases (0 otherwise)"""
+        if self.path and os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("source") == self.source and data.get("target") == self.target:
+                self.last_id = int(data["last_id"])
+            else:
+                logger.warning(f"⚠️ Checkpoint {self.path} is for another migration, starting over")
+        return self.last_id
+
+    def commit(self, chunk: int, last_id: int) -> None:
+        """Record a committed chunk (numbered in reading order)"""
+        with self._lock:
+            self._committed[chunk] = last_id
+            advanced = False
+            while self._next_chunk in self._committed:
+                self.last_id = self._committed.pop(self._next_chunk)
+                self._next_chunk += 1
+                advanced = True
+            if advanced:
+                self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        data = {
+            "source": self.source,
+            "target": self.target,
+            "last_id": self.last_id,
+            "saved_at": datetime.now().isoformat(),
+        }
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(data, f)
+        os.replace(temporary, self.path)
+
+def migrate_users(
+    source_engine,
+    target_engine,
+    chunk_size: int = MIGRATION_CHUNK_SIZE,
+    workers: int = MIGRATION_WORKERS,
+    checkpoint_path: Optional[str] = MIGRATION_CHECKPOINT,
+    keep_ids: bool = False,
+    restart: bool = False,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Copy the users of `source_engine` into `target_engine`.
+
+    Returns {"read", "inserted", "skipped", "resumed_from", "last_id",
+    "seconds", "rows_per_second"}; `progress` receives the same counters
+    after every committed chunk (from a writer thread).
+    """
+    checkpoint = Checkpoint(checkpoint_path, _url_key(source_engine), _url_key(target_engine))
+    resumed_from = 0 if restart else checkpoint.load()
+    checkpoint.last_id = resumed_from
+    statement = insert_ignore_statement(target_engine.dialect.name)
+    columns = [column.key for column in USERS.columns if keep_ids or column.key != "id"]
+
+    chunks: queue.Queue = queue.Queue(maxsize=2 * workers)
+    errors: List[Exception] = []
+    counters = {"read": 0, "inserted": 0}
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def report() -> Dict[str, Any]:
+        elapsed = time.perf_counter() - started
+        return {
+            "read": counters["read"],
+            "inserted": counters["inserted"],
+            "skipped": counters["read"] - counters["inserted"],
+            "resumed_from": resumed_from,
+            "last_id": checkpoint.last_id,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(counters["read"] / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def write_chunks():
+        while True:
+            item = chunks.get()
+            if item is None:
+                return
+            if errors:
+                # A chunk failed: drain the queue without writing past it
+                continue
+            number, last_id, rows = item
+            try:
+                with target_engine.begin() as conn:
+                    inserted = conn.execute(statement, rows).rowcount
+                with lock:
+                    counters["read"] += len(rows)
+                    counters["inserted"] += max(inserted, 0)
+                checkpoint.commit(number, last_id)
+                if progress is not None:
+                    progress(report())
+            except Exception as e:
+                # Keep consuming: the reader must never block on a full queue
+                logger.error(f"❌ Migration chunk ending at id {last_id} failed: {e}")
+                errors.append(e)
+
+    writers = [
+        threading.Thread(target=write_chunks, name=f"migration-writer-{i}", daemon=True)
+        for i in range(max(workers, 1))
+    ]
+    for writer in writers:
+        writer.start()
+
+    try:
+        with source_engine.connect() as source:
+            last_id, number = resumed_from, 0
+            while not errors:
+                rows = source.execute(
+                    select(USERS).where(USERS.c.id > last_id).order_by(USERS.c.id).limit(chunk_size)
+                ).mappings().all()
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+                chunks.put((number, last_id, [{key: row[key] for key in columns} for row in rows]))
+                number += 1
+    finally:
+        for _ in writers:
+            chunks.put(None)
+        for writer in writers:
+            writer.join()
+
+    if errors:
+        raise errors[0]
+    return report()
+
+def main():
+    from db.connexion import ENV_DATABASE_URL, LOCAL_DATABASE_URL, aws_database_url
+    from db.schema import upgrade
+
+    parser = argparse.ArgumentParser(description="Copy the users table (SQLite to MySQL) with resumable checkpoints")
+    parser.add_argument("--source", default=LOCAL_DATABASE_URL)
+    parser.add_argument("--target", default=ENV_DATABASE_URL or aws_database_url())
+    parser.add_argument("--chunk-size", type=int, default=MIGRATION_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=MIGRATION_WORKERS)
+    parser.add_argument("--checkpoint", default=MIGRATION_CHECKPOINT)
+    parser.add_argument("--keep-ids", action="store_true", help="Copy the ids too (target must not already use them)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first user")
+    args = parser.parse_args()
+
+    source_engine = build_engine(args.source)
+    target_engine = build_engine(args.target)
+    upgrade(target_engine)
+
+    last_print = [0.0]
+
+    def print_progress(counters):
+        if time.monotonic() - last_print[0] >= 1:
+            last_print[0] = time.monotonic()
+            print(f"   ... {counters['read']:,} users read, {counters['inserted']:,} inserted "
+                  f"({counters['rows_per_second']:,.0f} rows/s, id {counters['last_id']})")
+
+    print(f"🚚 Migrating users: {_url_key(source_engine)} -> {_url_key(target_engine)}")
+    try:
+        result = migrate_users(
+            source_engine, target_engine, chunk_size=args.chunk_size, workers=args.workers,
+            checkpoint_path=args.checkpoint, keep_ids=args.keep_ids, restart=args.restart,
+            progress=print_progress
+        )
+    except Exception as e:
+        print(f"❌ Migration failed: {e} (rerun to resume from the checkpoint)")
+        raise SystemExit(1)
+    finally:
+        source_engine.dispose()
+        target_engine.dispose()
+
+    print(f"✅ {result['inserted']:,} users migrated, {result['skipped']:,} already present "
+          f"(resumed from id {result['resumed_from']}) in {result['seconds']:.2f}s - {result['rows_per_second']:,.0f} rows/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# db/routing.py
+"""
+Primary / read-replica routing.
+
+RoutingSession sends SELECT statements to a read replica and everything
+else (flushes, INSERT / UPDATE / DELETE, raw SQL, SELECT ... FOR UPDATE)
+to the primary engine, so the CRUD functions need no change. A SELECT
+whose result must not lag behind the primary (it fills the shared user
+cache, or decides what a write does) is marked with
+`.execution_options(use_primary=True)`.
+
+Configuration:
+* DB_REPLICA_URLS           : comma-separated replica URLs (routing disabled when empty)
+* DB_REPLICA_WEIGHTS        : comma-separated weights, same order (default 1 each)
+* DB_REPLICA_EJECT_SECONDS  : how long a failing replica is taken out of rotation
+* DB_REPLICA_CHECK_INTERVAL : period of the background health check (lifespan)
+* DB_STICKY_SECONDS         : read-your-writes window after a write from a client
+
+Read-your-writes: once a session has written, its later reads use the
+primary. Across requests, api.middleware.ReadYourWritesMiddleware sets a
+RoutingState for the request (from a cookie) that RoutingSession reads and
+marks when it writes.
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DB_REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_WEIGHTS = [float(w) for w in os.getenv("DB_REPLICA_WEIGHTS", "").split(",") if w.strip()]
+DB_REPLICA_EJECT_SECONDS = float(os.getenv("DB_REPLICA_EJECT_SECONDS", "30"))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "10"))
+DB_STICKY_SECONDS = float(os.getenv("DB_STICKY_SECONDS", "5"))
+
+class RoutingState:
+    """
+    Per-request routing state: prefer_primary is set by the middleware,
+    wrote is set by RoutingSession on the first write
+    """
+
+    def __init__(self, prefer_primary: bool = False):
+        self.prefer_primary = prefer_primary
+        self.wrote = False
+
+# Current request's routing state (None outside HTTP requests)
+_routing_state: contextvars.ContextVar = contextvars.ContextVar("db_routing_state", default=None)
+
+def set_routing_state(state: RoutingState) -> contextvars.Token:
+    return _routing_state.set(state)
+
+def reset_routing_state(token: contextvars.Token) -> None:
+    _routing_state.reset(token)
+
+def get_routing_state() -> Optional[RoutingState]:
+    return _routing_state.get()
+
+class Replica:
+    """
+    One read replica: its engine, weight and ejection state
+    """
+
+    def __init__(self, url: str, engine, weight: float = 1.0):
+        self.url = url
+        self.engine = engine
+        self.weight = weight
+        self.ejected_until = 0.0
+        self.failures = 0
+        self.last_error = None
+
+    @property
+    def bind(self):
+        """Sync engine used by Session.get_bind (AsyncEngine -> sync_engine)"""
+        return getattr(self.engine, "sync_engine", self.engine)
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+class ReplicaSet:
+    """
+    Weighted replica selection with health-based ejection
+    """
+
+    def __init__(self, replicas: List[Replica], eject_seconds: float = DB_REPLICA_EJECT_SECONDS):
+        self.replicas = replicas
+        self.eject_seconds = eject_seconds
+        self._lock = threading.Lock()
+        for replica in replicas:
+            self._watch_errors(replica)
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def _watch_errors(self, replica: Replica) -> None:
+        """Eject a replica as soon as it drops a connection or refuses one"""
+
+        @event.listens_for(replica.bind, "handle_error")
+        def eject_on_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.eject(replica, context.original_exception)
+
+    def pick(self) -> Optional[Replica]:
+        """Random replica by weight among those in rotation (None: use the primary)"""
+        now = time.monotonic()
+        candidates = [replica for replica in self.replicas if replica.available(now)]
+        if not candidates:
+            return None
+        return random.choices(candidates, weights=[replica.weight for replica in candidates])[0]
+
+    def eject(self, replica: Replica, error: Any = None) -> None:
+        with self._lock:
+            replica.failures += 1
+            replica.last_error = str(error) if error is not None else None
+            replica.ejected_until = time.monotonic() + self.eject_seconds
+        logger.warning(f"⚠️ Read replica {replica.url} ejected for {self.eject_seconds:.0f}s: {error}")
+
+    def restore(self, replica: Replica) -> None:
+        if replica.ejected_until:
+            logger.info(f"✅ Read replica {replica.url} back in rotation")
+        with self._lock:
+            replica.ejected_until = 0.0
+            replica.last_error = None
+
+    async def check_health(self) -> None:
+        """SELECT 1 on every replica: eject the failing ones, restore the others"""
+        for replica in self.replicas:
+            try:
+                if isinstance(replica.engine, AsyncEngine):
+                    async with replica.engine.connect() as conn:
+                        await conn.execute(text("SELECT 1"))
+                else:
+                    await asyncio.to_thread(_ping, replica.engine)
+            except Exception as e:
+                self.eject(replica, e)
+            else:
+                self.restore(replica)
+
+    def derive(self, factory: Callable) -> "ReplicaSet":
+        """Same replicas and weights on engines built by `factory(engine)` (e.g. async engines)"""
+        return ReplicaSet(
+            [Replica(replica.url, factory(replica.engine), replica.weight) for replica in self.replicas],
+            eject_seconds=self.eject_seconds,
+        )
+
+    def status(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "url": replica.bind.url.render_as_string(hide_password=True),
+                "weight": replica.weight,
+                "in_rotation": replica.available(now),
+                "ejected_for_s": round(max(replica.ejected_until - now, 0.0), 1),
+                "failures": replica.failures,
+                "last_error": replica.last_error,
+            }
+            for replica in self.replicas
+        ]
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.bind.dispose()
+
+def _ping(engine) -> None:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+def create_replica_set(engine_factory: Callable) -> Optional[ReplicaSet]:
+    """
+    Build the replica set from DB_REPLICA_URLS with `engine_factory(url)`, None when not configured
+    """
+    if not DB_REPLICA_URLS:
+        return None
+    weights = DB_REPLICA_WEIGHTS or [1.0] * len(DB_REPLICA_URLS)
+    if len(weights) != len(DB_REPLICA_URLS):
+        raise ValueError("DB_REPLICA_WEIGHTS must have one weight per DB_REPLICA_URLS entry")
+    replicas = [Replica(url, engine_factory(url), weight) for url, weight in zip(DB_REPLICA_URLS, weights)]
+    logger.info(f"🔀 Read replicas enabled: {len(replicas)}")
+    return ReplicaSet(replicas)
+
+class RoutingSession(Session):
+    """
+    Session routing reads to a replica and writes to the primary (bind)
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self._replica = None
+        self._wrote = False
+
+    def _mark_write(self) -> None:
+        # Later reads of this session, and of this client (cookie), use the primary
+        self._wrote = True
+        state = get_routing_state()
+        if state is not None:
+            state.wrote = True
+
+    def _use_primary(self, clause) -> bool:
+        if self._flushing or isinstance(clause, (UpdateBase, TextClause)):
+            # INSERT / UPDATE / DELETE, or raw SQL that may write
+            self._mark_write()
+            return True
+        if not isinstance(clause, Select) or clause._for_update_arg is not None:
+            # No statement (db.get_bind(), db.connection()) or locking read
+            return True
+        if clause._execution_options.get("use_primary"):
+            # Read that must see the latest committed writes
+            return True
+        state = get_routing_state()
+        return self._wrote or (state is not None and state.prefer_primary)
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if not self.replicas or self._use_primary(clause):
+            return super().get_bind(mapper, clause=clause, **kw)
+        # One replica per session, so that a transaction reads a consistent snapshot
+        if self._replica is None or not self._replica.available(time.monotonic()):
+            self._replica = self.replicas.pick()
+        if self._replica is None:
+            return super().get_bind(mapper, clause=clause, **kw)
+        return self._replica.bind
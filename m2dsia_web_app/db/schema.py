@@ -0,0 +1,136 @@
+# db/schema.py
+"""
+Versioned database schema: Alembic migrations in migrations/versions.
+
+At startup api/main.py only compares the revision stored in the
+alembic_version table with the head revision of the scripts (one SELECT,
+no DDL). When they differ:
+* SCHEMA_AUTO_MIGRATE=true (default): the missing migrations run first;
+* SCHEMA_AUTO_MIGRATE=false: startup fails with SchemaOutOfDate, the
+  migrations being a deployment step (`alembic upgrade head`).
+
+Databases created before the migrations (create_all, setup scripts) have
+no alembic_version table: the first revisions only create what is missing,
+so such a database is adopted by a plain upgrade.
+
+Indexes are built online on MySQL (ALGORITHM=INPLACE, LOCK=NONE): reads
+and writes of the table go on during the build, see create_index_online.
+
+Usage:
+    alembic upgrade head
+    alembic revision -m "users: add column x"
+    alembic current
+"""
+import logging
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+from alembic import command, context, op
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SCHEMA_AUTO_MIGRATE = os.getenv("SCHEMA_AUTO_MIGRATE", "true").lower() == "true"
+SCHEMA_LOCK_TIMEOUT = int(os.getenv("SCHEMA_LOCK_TIMEOUT", "60"))
+
+APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ALEMBIC_INI = os.path.join(APP_ROOT, "alembic.ini")
+
+# MySQL named lock: one process migrates, the others wait for it
+SCHEMA_LOCK_NAME = "m2dsia_schema_migration"
+
+class SchemaOutOfDate(RuntimeError):
+    """The database is not at the head revision and SCHEMA_AUTO_MIGRATE is off"""
+
+def alembic_config(connection=None) -> Config:
+    """Alembic configuration of the project, optionally bound to an open connection"""
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(APP_ROOT, "migrations"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+@lru_cache(maxsize=1)
+def head_revision() -> str:
+    """Latest revision of migrations/versions (read once per process)"""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+def current_revision(engine) -> Optional[str]:
+    """Revision stored in the database (None: never migrated)"""
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+def upgrade(engine, revision: str = "head") -> None:
+    """Run the migrations up to `revision`"""
+    with engine.begin() as conn:
+        if conn.dialect.name == "mysql":
+            # 1: acquired, 0: timed out, NULL: error
+            locked = conn.execute(text("SELECT GET_LOCK(:name, :timeout)"),
+                                  {"name": SCHEMA_LOCK_NAME, "timeout": SCHEMA_LOCK_TIMEOUT}).scalar()
+            if locked != 1:
+                raise RuntimeError(
+                    f"Schema migration lock '{SCHEMA_LOCK_NAME}' not acquired within {SCHEMA_LOCK_TIMEOUT}s "
+                    "(another process is migrating)"
+                )
+        try:
+            command.upgrade(alembic_config(conn), revision)
+        finally:
+            if conn.dialect.name == "mysql":
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": SCHEMA_LOCK_NAME})
+
+def ensure_schema(engine, auto_migrate: bool = SCHEMA_AUTO_MIGRATE) -> str:
+    """
+    Check that the database is at the head revision, migrating it when allowed.
+    Returns the revision of the database.
+    """
+    current, head = current_revision(engine), head_revision()
+    if current == head:
+        return current
+    if not auto_migrate:
+        raise SchemaOutOfDate(
+            f"Database schema at revision {current}, expected {head}: run `alembic upgrade head`"
+        )
+    logger.info(f"🛠️ Migrating database schema: {current} -> {head}")
+    upgrade(engine)
+    return head
+
+# === HELPERS FOR THE MIGRATION SCRIPTS ===
+
+def has_table(table: str) -> bool:
+    """Whether the table exists (False when emitting SQL: alembic upgrade --sql)"""
+    return not context.is_offline_mode() and inspect(op.get_bind()).has_table(table)
+
+def index_names(table: str) -> List[str]:
+    """Indexes of the table (none when emitting SQL: alembic upgrade --sql)"""
+    if context.is_offline_mode():
+        return []
+    return [index["name"] for index in inspect(op.get_bind()).get_indexes(table)]
+
+def create_index_online(name: str, table: str, columns: List[str], unique: bool = False) -> None:
+    """
+    CREATE INDEX without blocking writes on MySQL (plain CREATE INDEX elsewhere).
+    An index that already exists (database created by create_all) is kept.
+    """
+    if name in index_names(table):
+        return
+    if op.get_bind().dialect.name == "mysql":
+        op.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({', '.join(columns)}) "
+            "ALGORITHM=INPLACE LOCK=NONE"
+        )
+    else:
+        op.create_index(name, table, columns, unique=unique)
+
+def drop_index_online(name: str, table: str) -> None:
+    """DROP INDEX without blocking writes on MySQL (skipped when the index is missing)"""
+    if not context.is_offline_mode() and name not in index_names(table):
+        return
+    if op.get_bind().dialect.name == "mysql":
+        op.execute(f"DROP INDEX {name} ON {table} ALGORITHM=INPLACE LOCK=NONE")
+    else:
+        op.drop_index(name, table_name=table)
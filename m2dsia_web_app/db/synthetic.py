@@ -0,0 +1,168 @@
+# db/synthetic.py
+"""
+Deterministic synthetic users, to fill the users table at production scale.
+
+The same seed always gives the same users: realistic French first / last
+names, unique emails, classes drawn from a weighted distribution, an active
+ratio, and created_at / updated_at spread over a date range. Rows are
+bulk-loaded by multi-row INSERT batches that skip existing emails, so a
+reload with the same seed inserts nothing. On SQLite the full-text index is
+rebuilt once after the load instead of by a trigger on every row.
+
+Usage:
+    python -m db.synthetic --rows 1000000 --seed 42
+    python -m db.synthetic --rows 200000 --classes "MLOps 2025=3,IA 2026=1" --active-ratio 0.8
+"""
+import argparse
+import itertools
+import os
+import random
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from db.migration import insert_ignore_statement
+from models.models import deferred_search_index
+
+# Configuration
+SYNTHETIC_BATCH_SIZE = int(os.getenv("SYNTHETIC_BATCH_SIZE", "10000"))
+
+DEFAULT_CLASS_WEIGHTS = {
+    "MLOps 2025": 30,
+    "MLOps 2026": 30,
+    "Cloud Computing 2025": 15,
+    "Data Science 2025": 15,
+    "IA 2026": 10,
+}
+
+PRENOMS = [
+    "Léa", "Hugo", "Chloé", "Lucas", "Manon", "Louis", "Emma", "Gabriel", "Inès", "Arthur",
+    "Camille", "Jules", "Sarah", "Adam", "Jade", "Nathan", "Louise", "Raphaël", "Zoé", "Mathis",
+    "Alice", "Théo", "Lina", "Noah", "Clara", "Ethan", "Anaïs", "Paul", "Maëlys", "Yanis",
+    "Fatou", "Moussa", "Aïcha", "Mamadou", "Awa", "Ibrahima", "Mariam", "Amadou", "Khady", "Ousmane",
+]
+
+NOMS = [
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau",
+    "Simon", "Laurent", "Lefèvre", "Michel", "Garcia", "David", "Bertrand", "Roux", "Vincent", "Fournier",
+    "Morel", "Girard", "André", "Mercier", "Dupont", "Lambert", "Bonnet", "François", "Martinez", "Legrand",
+    "Diallo", "Ndiaye", "Diop", "Traoré", "Sow", "Fall", "Cissé", "Koné", "Sylla", "Camara",
+]
+
+DOMAINS = ["isi.com", "etu.m2dsia.fr", "gmail.com", "outlook.fr", "yahoo.fr"]
+
+def parse_class_weights(value: str) -> Dict[str, float]:
+    """Parse 'MLOps 2025=3,IA 2026=1' into {classe: weight}"""
+    weights = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        classe, _, weight = item.rpartition("=")
+        if not classe.strip():
+            raise ValueError(f"Invalid class weight: {item!r} (expected 'classe=weight')")
+        weights[classe.strip()] = float(weight)
+    return weights
+
+def _ascii(value: str) -> str:
+    return unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode().lower().replace(" ", "")
+
+def generate_users(
+    count: int,
+    seed: int = 42,
+    class_weights: Optional[Dict[str, float]] = None,
+    active_ratio: float = 0.9,
+    since: datetime = datetime(2020, 1, 1),
+    until: datetime = datetime(2025, 1, 1)
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield `count` users as column dicts (no id), the same for the same arguments
+    """
+    rng = random.Random(seed)
+    class_weights = class_weights or DEFAULT_CLASS_WEIGHTS
+    classes = list(class_weights)
+    cumulative = list(itertools.accumulate(class_weights.values()))
+    span = int((until - since).total_seconds())
+
+    for i in range(count):
+        prenom = rng.choice(PRENOMS)
+        nom = rng.choice(NOMS)
+        created_at = since + timedelta(seconds=rng.randrange(span))
+        updated_at = created_at + timedelta(seconds=rng.randrange(int((until - created_at).total_seconds()) + 1))
+        yield {
+            # The index keeps the emails unique for any count
+            "email": f"{_ascii(prenom)}.{_ascii(nom)}{i}@{rng.choice(DOMAINS)}",
+            "nom": nom,
+            "prenom": prenom,
+            "classe": rng.choices(classes, cum_weights=cumulative)[0],
+            "is_active": rng.random() < active_ratio,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+def load_users(
+    engine,
+    count: int,
+    batch_size: int = SYNTHETIC_BATCH_SIZE,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    **generator_options
+) -> Dict[str, Any]:
+    """
+    Bulk-load `count` synthetic users (one transaction per batch, existing emails skipped).
+    Returns {"generated", "inserted", "seconds", "rows_per_second"}.
+    """
+    statement = insert_ignore_statement(engine.dialect.name)
+    users = generate_users(count, **generator_options)
+    generated = inserted = 0
+    started = time.perf_counter()
+
+    def report() -> Dict[str, Any]:
+        elapsed = time.perf_counter() - started
+        return {
+            "generated": generated,
+            "inserted": inserted,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(generated / elapsed, 1) if elapsed else 0.0,
+        }
+
+    with deferred_search_index(engine):
+        while True:
+            batch: List[Dict[str, Any]] = list(itertools.islice(users, batch_size))
+            if not batch:
+                break
+            with engine.begin() as conn:
+                inserted += max(conn.execute(statement, batch).rowcount, 0)
+            generated += len(batch)
+            if progress is not None:
+                progress(report())
+    return report()
+
+def main():
+    from db.connexion import get_engine
+    from db.schema import upgrade
+
+    parser = argparse.ArgumentParser(description="Fill the users table with deterministic synthetic users")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--classes", type=parse_class_weights, default=DEFAULT_CLASS_WEIGHTS,
+                        help="Class distribution, e.g. 'MLOps 2025=3,IA 2026=1'")
+    parser.add_argument("--active-ratio", type=float, default=0.9)
+    parser.add_argument("--batch-size", type=int, default=SYNTHETIC_BATCH_SIZE)
+    args = parser.parse_args()
+
+    engine = get_engine()
+    upgrade(engine)
+
+    def print_progress(counters):
+        print(f"   ... {counters['generated']:,} users ({counters['rows_per_second']:,.0f} rows/s)")
+
+    print(f"🎲 Loading {args.rows:,} synthetic users (seed {args.seed}) into {engine.url.render_as_string(hide_password=True)}")
+    result = load_users(
+        engine, args.rows, batch_size=args.batch_size, progress=print_progress,
+        seed=args.seed, class_weights=args.classes, active_ratio=args.active_ratio
+    )
+    print(f"✅ {result['inserted']:,} users inserted ({result['generated'] - result['inserted']:,} already present) "
+          f"in {result['seconds']:.1f}s - {result['rows_per_second']:,.0f} rows/s")
+
+if __name__ == "__main__":
+    main()
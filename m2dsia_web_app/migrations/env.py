@@ -0,0 +1,67 @@
+# migrations/env.py
+"""
+Alembic environment: migrates the database selected by db/connexion.py,
+or the connection handed over by db.schema.upgrade (application startup).
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import make_url
+
+from db.connexion import get_engine
+from models.models import Base, USERS_FTS_TABLE
+
+config = context.config
+target_metadata = Base.metadata
+
+# Command line only: the application keeps its own logging configuration
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name)
+
+def include_name(name, type_, parent_names):
+    # The SQLite FTS5 shadow tables are created by the migrations, not declared in the models
+    return not (type_ == "table" and name.startswith(USERS_FTS_TABLE))
+
+def configure(dialect, **options):
+    def include_object(object, name, type_, reflected, compare_to):
+        # Indexes restricted to another backend (the MySQL FULLTEXT index) are not compared
+        if type_ == "index" and not reflected:
+            ddl_if = object._ddl_if
+            return ddl_if is None or ddl_if.dialect is None or ddl_if.dialect == dialect
+        return True
+
+    context.configure(
+        target_metadata=target_metadata,
+        include_name=include_name,
+        include_object=include_object,
+        compare_type=True,
+        **options
+    )
+
+def run_migrations_offline():
+    """Emit the SQL script instead of running it (alembic upgrade head --sql)"""
+    url = config.get_main_option("sqlalchemy.url") or get_engine().url.render_as_string(hide_password=False)
+    configure(make_url(url).get_backend_name(), url=url, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    def run(connection):
+        # SQLite cannot ALTER most constraints: batch mode recreates the table
+        dialect = connection.dialect.name
+        configure(dialect, connection=connection, render_as_batch=dialect == "sqlite")
+        with context.begin_transaction():
+            context.run_migrations()
+
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run(connection)
+        return
+    with get_engine().connect() as connection:
+        run(connection)
+        connection.commit()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,59 @@
+"""users table and full-text search index
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00
+
+Adopts the databases created before the migrations (create_all, setup
+scripts): only what is missing is created.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from db.schema import has_table, index_names
+from models.models import SQLITE_FTS_DDL, USERS_FTS_TABLE
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if not has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("email", sa.String(255), nullable=False),
+            sa.Column("nom", sa.String(255), nullable=False),
+            sa.Column("prenom", sa.String(255), nullable=False),
+            sa.Column("classe", sa.String(255), nullable=False),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if dialect == "sqlite":
+        indexed = has_table(USERS_FTS_TABLE)
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        if not indexed:
+            op.execute(f"INSERT INTO {USERS_FTS_TABLE}({USERS_FTS_TABLE}) VALUES ('rebuild')")
+    elif dialect == "mysql":
+        if "ft_users_search" not in index_names("users"):
+            op.execute("CREATE FULLTEXT INDEX ft_users_search ON users (nom, prenom, email)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        for trigger in ("users_fts_ai", "users_fts_ad", "users_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute(f"DROP TABLE IF EXISTS {USERS_FTS_TABLE}")
+    op.drop_table("users")
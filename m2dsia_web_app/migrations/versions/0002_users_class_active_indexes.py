@@ -0,0 +1,28 @@
+"""users: (classe, is_active) and (is_active, id) indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:30:00
+
+get_users_by_class / get_active_users filter on classe and is_active, the
+active users pages walk is_active then id. Built online on MySQL.
+"""
+from typing import Sequence, Union
+
+from db.schema import create_index_online, drop_index_online
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index_online("ix_users_classe_is_active", "users", ["classe", "is_active"])
+    create_index_online("ix_users_is_active_id", "users", ["is_active", "id"])
+
+
+def downgrade() -> None:
+    drop_index_online("ix_users_is_active_id", "users")
+    drop_index_online("ix_users_classe_is_active", "users")
@@ -0,0 +1,45 @@
+"""users: covering indexes for the class / active pages, statistics and versions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:00:00
+
+* (classe, id): class pages without a sort;
+* (classe, is_active, updated_at) replaces (classe, is_active): statistics
+  and per-class collection versions read the index only;
+* (is_active, id, updated_at) replaces (is_active, id): same pages, and the
+  active users version reads the index only;
+* ix_users_id (and idx_id of setup_aws_database.py) duplicated the primary key.
+
+The new indexes are built before the old ones are dropped, online on MySQL.
+"""
+from typing import Sequence, Union
+
+from db.schema import create_index_online, drop_index_online, index_names
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index_online("ix_users_classe_id", "users", ["classe", "id"])
+    create_index_online("ix_users_classe_is_active_updated_at", "users", ["classe", "is_active", "updated_at"])
+    create_index_online("ix_users_is_active_id_updated_at", "users", ["is_active", "id", "updated_at"])
+    drop_index_online("ix_users_classe_is_active", "users")
+    drop_index_online("ix_users_is_active_id", "users")
+    drop_index_online("ix_users_id", "users")
+    # Only on the databases created by setup_aws_database.py
+    if "idx_id" in index_names("users"):
+        drop_index_online("idx_id", "users")
+
+
+def downgrade() -> None:
+    create_index_online("ix_users_id", "users", ["id"])
+    create_index_online("ix_users_is_active_id", "users", ["is_active", "id"])
+    create_index_online("ix_users_classe_is_active", "users", ["classe", "is_active"])
+    drop_index_online("ix_users_is_active_id_updated_at", "users")
+    drop_index_online("ix_users_classe_is_active_updated_at", "users")
+    drop_index_online("ix_users_classe_id", "users")
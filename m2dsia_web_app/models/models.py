@@ -1,12 +1,16 @@
 # models/models.py
-from sqlalchemy import Column, String, Integer, DateTime, Boolean
+import logging
+from contextlib import contextmanager
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, Index, inspect, text
 from sqlalchemy.sql import func
 from db.connexion import Base
 
+logger = logging.getLogger(__name__)
+
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
     nom = Column(String(255), nullable=False)
     prenom = Column(String(255), nullable=False)
@@ -16,4 +20,124 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     def __repr__(self):
-        return f"<User(id={self.id}, email='{self.email}', nom='{self.nom}', prenom='{self.prenom}')>"
\ No newline at end of file
+        return f"<User(id={self.id}, email='{self.email}', nom='{self.nom}', prenom='{self.prenom}')>"
+
+# === INDEX COMPOSITES ===
+# Created on existing databases by migrations/versions (db/schema.py),
+# plans checked by db/query_plans.py
+
+# Class pages: classe = ?, id > cursor ORDER BY id (no sort)
+Index("ix_users_classe_id", User.classe, User.id)
+# Covering: statistics GROUP BY classe, is_active and collection version
+# (count, max(updated_at)) per class, without reading the rows
+Index("ix_users_classe_is_active_updated_at", User.classe, User.is_active, User.updated_at)
+# Active users pages (is_active = ?, id > cursor) and their collection version (covering)
+Index("ix_users_is_active_id_updated_at", User.is_active, User.id, User.updated_at)
+
+# === INDEX DE RECHERCHE PLEIN TEXTE ===
+
+# MySQL: FULLTEXT index used by crud.search_users (MATCH ... AGAINST)
+Index(
+    "ft_users_search", User.nom, User.prenom, User.email,
+    mysql_prefix="FULLTEXT"
+).ddl_if(dialect="mysql")
+
+# SQLite: FTS5 shadow table (external content) kept in sync by triggers.
+# The trigram tokenizer keeps the substring semantics of the original search.
+USERS_FTS_TABLE = "users_fts"
+
+SQLITE_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {USERS_FTS_TABLE} USING fts5(
+        nom, prenom, email,
+        content='users', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO {USERS_FTS_TABLE}(rowid, nom, prenom, email)
+        VALUES (new.id, new.nom, new.prenom, new.email);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+        INSERT INTO {USERS_FTS_TABLE}({USERS_FTS_TABLE}, rowid, nom, prenom, email)
+        VALUES ('delete', old.id, old.nom, old.prenom, old.email);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF nom, prenom, email ON users BEGIN
+        INSERT INTO {USERS_FTS_TABLE}({USERS_FTS_TABLE}, rowid, nom, prenom, email)
+        VALUES ('delete', old.id, old.nom, old.prenom, old.email);
+        INSERT INTO {USERS_FTS_TABLE}(rowid, nom, prenom, email)
+        VALUES (new.id, new.nom, new.prenom, new.email);
+    END
+    """,
+]
+
+def has_search_index(engine) -> bool:
+    """
+    Check (read-only) whether the full-text search structures exist
+    """
+    try:
+        dialect = engine.dialect.name
+        if dialect == "sqlite":
+            return inspect(engine).has_table(USERS_FTS_TABLE)
+        if dialect == "mysql":
+            indexes = {index["name"] for index in inspect(engine).get_indexes("users")}
+            return "ft_users_search" in indexes
+        return False
+    except Exception:
+        return False
+
+def ensure_search_index(engine) -> bool:
+    """
+    Create the full-text search structures for the users table if missing.
+    Returns True when a text index is available for crud.search_users.
+    """
+    try:
+        dialect = engine.dialect.name
+        if dialect == "sqlite":
+            with engine.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": USERS_FTS_TABLE}
+                ).first()
+                for statement in SQLITE_FTS_DDL:
+                    conn.execute(text(statement))
+                if not exists:
+                    # Index rows that were inserted before the FTS table existed
+                    conn.execute(text(
+                        f"INSERT INTO {USERS_FTS_TABLE}({USERS_FTS_TABLE}) VALUES ('rebuild')"
+                    ))
+            return True
+        if dialect == "mysql":
+            if not has_search_index(engine):
+                with engine.begin() as conn:
+                    conn.execute(text(
+                        "CREATE FULLTEXT INDEX ft_users_search ON users (nom, prenom, email)"
+                    ))
+            return True
+        return False
+    except Exception as e:
+        logger.warning(f"⚠️ Full-text search index unavailable, falling back to LIKE: {e}")
+        return False
+
+@contextmanager
+def deferred_search_index(engine):
+    """
+    Bulk inserts without the per-row FTS trigger on SQLite: the insert
+    trigger is dropped, then recreated and the index rebuilt once at exit
+    """
+    if engine.dialect.name != "sqlite" or not has_search_index(engine):
+        yield
+        return
+    with engine.begin() as conn:
+        conn.execute(text("DROP TRIGGER IF EXISTS users_fts_ai"))
+    try:
+        yield
+    finally:
+        with engine.begin() as conn:
+            for statement in SQLITE_FTS_DDL:
+                conn.execute(text(statement))
+            conn.execute(text(f"INSERT INTO {USERS_FTS_TABLE}({USERS_FTS_TABLE}) VALUES ('rebuild')"))
@@ -1,7 +1,7 @@
 # schemas/schemas.py
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, field_validator
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -41,4 +41,64 @@ class UserResponse(BaseModel):
     is_active: bool
     
     # CORRECTION: Utiliser model_config au lieu de class Config
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class UserPage(BaseModel):
+    """Schema for paginated list responses"""
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+class UserDetailPage(BaseModel):
+    """Schema for paginated list responses with the full User schema (full=true)"""
+    items: List[User]
+    next_cursor: Optional[str] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+class BulkRowResult(BaseModel):
+    """Outcome of one row of a bulk import"""
+    row: int
+    email: Optional[str] = None
+    status: str
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkImportReport(BaseModel):
+    """Schema for bulk import responses"""
+    total: int
+    summary: Dict[str, int]
+    rows_per_second: float
+    results: List[BulkRowResult]
+
+class BulkUserFilter(BaseModel):
+    """Selection of users for bulk operations (criteria are combined with AND)"""
+    ids: Optional[List[int]] = Field(None, max_length=10000)
+    classe: Optional[str] = None
+    is_active: Optional[bool] = None
+
+class BulkUserValues(BaseModel):
+    """Values applied by a bulk update (email is unique, so it cannot be bulk-updated)"""
+    nom: Optional[str] = None
+    prenom: Optional[str] = None
+    classe: Optional[str] = None
+    is_active: Optional[bool] = None
+    
+    @field_validator("nom", "prenom", "classe", "is_active")
+    @classmethod
+    def not_null(cls, value):
+        # Omitted fields are left unchanged; null would hit the NOT NULL columns
+        if value is None:
+            raise ValueError("must not be null (omit the field to leave it unchanged)")
+        return value
+
+class BulkUserUpdate(BaseModel):
+    """Schema for bulk update requests"""
+    filter: BulkUserFilter
+    values: BulkUserValues
+
+class BulkOperationResult(BaseModel):
+    """Schema for bulk update / delete responses"""
+    affected: int
+    users: Optional[List[UserResponse]] = None
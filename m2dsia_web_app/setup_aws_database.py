@@ -81,48 +81,27 @@ def create_database():
         return False
 
 def create_tables():
-    """Create all tables using direct SQL"""
+    """Create or migrate the tables (Alembic migrations: db/schema.py)"""
     print_step("3", "Creating Tables")
     
     try:
-        connection = pymysql.connect(
-            host=AWS_RDS_CONFIG["host"],
-            user=AWS_RDS_CONFIG["user"],
-            password=AWS_RDS_CONFIG["password"],
-            database=AWS_RDS_CONFIG["database"],
-            port=AWS_RDS_CONFIG["port"],
-            connect_timeout=30
-        )
+        from sqlalchemy import inspect
+        from db.connexion import aws_database_url
+        from db.engine import build_engine
+        from db.schema import current_revision, upgrade
         
-        with connection.cursor() as cursor:
-            # Create users table
-            create_table_sql = """
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                nom VARCHAR(255) NOT NULL,
-                prenom VARCHAR(255) NOT NULL,
-                classe VARCHAR(255) NOT NULL,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_email (email),
-                INDEX idx_id (id)
-            );
-            """
-            
-            cursor.execute(create_table_sql)
-            
-            # Show tables to verify
-            cursor.execute("SHOW TABLES")
-            tables = cursor.fetchall()
-            
-            print(f"✅ Tables created successfully!")
-            print(f"   📋 Tables found: {len(tables)}")
-            for table in tables:
-                print(f"      - {table[0]}")
-            
-        connection.close()
+        engine = build_engine(aws_database_url())
+        try:
+            upgrade(engine)
+            revision = current_revision(engine)
+            tables = inspect(engine).get_table_names()
+        finally:
+            engine.dispose()
+        
+        print(f"✅ Tables created successfully! (schema revision {revision})")
+        print(f"   📋 Tables found: {len(tables)}")
+        for table in tables:
+            print(f"      - {table}")
         return True
         
     except Exception as e:
@@ -222,7 +201,7 @@ def verify_setup():
         return False
 
 def migrate_from_sqlite():
-    """Migrate data from SQLite to AWS RDS"""
+    """Migrate data from SQLite to AWS RDS (chunked, parallel, resumable: db/migration.py)"""
     print_step("6", "Migrating from SQLite (if exists)")
     
     sqlite_file = "m2dsia_local.db"
@@ -232,61 +211,24 @@ def migrate_from_sqlite():
         return True
     
     try:
-        # Read from SQLite
-        import sqlite3
-        
-        sqlite_conn = sqlite3.connect(sqlite_file)
-        sqlite_cursor = sqlite_conn.cursor()
-        
-        # Get all users from SQLite
-        sqlite_cursor.execute("SELECT email, nom, prenom, classe FROM users")
-        sqlite_users = sqlite_cursor.fetchall()
-        
-        sqlite_conn.close()
-        
-        if not sqlite_users:
-            print("⚠️  No users found in SQLite database")
-            return True
-            
-        print(f"📊 Found {len(sqlite_users)} users in SQLite database")
+        from db.connexion import aws_database_url
+        from db.engine import build_engine
+        from db.migration import migrate_users
         
-        # Migrate to AWS RDS
-        aws_connection = pymysql.connect(
-            host=AWS_RDS_CONFIG["host"],
-            user=AWS_RDS_CONFIG["user"],
-            password=AWS_RDS_CONFIG["password"],
-            database=AWS_RDS_CONFIG["database"],
-            port=AWS_RDS_CONFIG["port"],
-            connect_timeout=30
-        )
-        
-        migrated_count = 0
-        
-        with aws_connection.cursor() as cursor:
-            for email, nom, prenom, classe in sqlite_users:
-                # Check if user already exists in AWS RDS
-                cursor.execute("SELECT COUNT(*) FROM users WHERE email = %s", (email,))
-                count = cursor.fetchone()[0]
-                
-                if count == 0:
-                    cursor.execute(
-                        "INSERT INTO users (email, nom, prenom, classe) VALUES (%s, %s, %s, %s)",
-                        (email, nom, prenom, classe)
-                    )
-                    migrated_count += 1
-                    print(f"✅ Migrated user: {email}")
-                else:
-                    print(f"⚠️  User {email} already exists in AWS RDS")
-            
-            # Commit all changes
-            aws_connection.commit()
+        source_engine = build_engine(f"sqlite:///{sqlite_file}")
+        target_engine = build_engine(aws_database_url())
+        try:
+            result = migrate_users(source_engine, target_engine)
+        finally:
+            source_engine.dispose()
+            target_engine.dispose()
         
-        aws_connection.close()
-        print(f"✅ Migration completed! {migrated_count} users migrated to AWS RDS")
+        print(f"✅ Migration completed! {result['inserted']} users migrated to AWS RDS, "
+              f"{result['skipped']} already present ({result['rows_per_second']:.0f} rows/s)")
         return True
         
     except Exception as e:
-        print(f"❌ Migration failed: {e}")
+        print(f"❌ Migration failed: {e} (rerun to resume from the checkpoint)")
         return False
 
 def configure_environment():
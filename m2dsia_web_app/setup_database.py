@@ -5,17 +5,18 @@ import os
 # Add the project root to Python path
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
-from db.connexion import Base, engine, SessionLocal
+from db.connexion import engine, SessionLocal
+from db.schema import upgrade
 from models.models import User as UserModel
 from schemas.schemas import UserCreate
 from db.crud import create_user, get_all_users
 
 def create_tables():
     """
-    Create all tables defined in models
+    Create or migrate the tables (migrations/versions)
     """
     try:
-        Base.metadata.create_all(bind=engine)
+        upgrade(engine)
         print("✅ Tables created successfully!")
         return True
     except Exception as e: